@@ -1,121 +1,118 @@
 import gradio as gr
 import json
-from datetime import datetime
-from core.assistance import ContractAssistant
+from core.assistance import ContractAssistant, LLM_REQUESTS
 from core.ContractGenerator import ContractGenerator
+from core.exporter import convert_contract_to_markdown, export_contract_files
+from core.jobs import JobQueue, format_job
+from core.session import StaleSessionError, create_session_manager
 from typing import Dict, List
 import os
+import copy
 
 # 初始化全局变量
-generator = ContractGenerator()
-assistant = ContractAssistant()
-current_contract = None
+# 目录来源：预编译的快照文件（mmap）、tools/run_workers.py 创建的共享内存，或数据库
+catalog = None
+if os.environ.get("LEXCRAFT_CATALOG_SNAPSHOT"):
+    from core.catalog_snapshot import SnapshotFile
+    snapshot = SnapshotFile(os.environ["LEXCRAFT_CATALOG_SNAPSHOT"])
+    snapshot.verify_in_background()
+    catalog = snapshot.catalog
+elif os.environ.get("LEXCRAFT_SHARED_CATALOG"):
+    from core.shared_catalog import SharedCatalog
+    shared_catalog = SharedCatalog.attach(os.environ["LEXCRAFT_SHARED_CATALOG"])
+    catalog = shared_catalog.catalog
+generator = ContractGenerator(catalog=catalog if catalog and 'render_plans' in catalog.sections() else None)
+assistant = ContractAssistant(catalog=catalog)
+try:
+    from config import SESSION_CONFIG
+except ImportError:
+    SESSION_CONFIG = {}
+sessions = create_session_manager(SESSION_CONFIG)
 
-def convert_contract_to_markdown(contract: Dict) -> str:
-    """Convert contract to Markdown format"""
-    md_content = []
-    
-    # Title
-    md_content.append("# Lease Agreement")
-    md_content.append(f"*Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n")
-    
-    # Basic Information
-    md_content.append("## Contract Information")
-    md_content.append(f"- Version: {contract.get('version', 'N/A')}")
-    md_content.append(f"- Type: {contract.get('type', 'N/A')}\n")
-    
-    # Sections
-    for section, content in contract.get('sections', {}).items():
-        if content:
-            md_content.append(f"## {section.title()}")
-            if isinstance(content, dict):
-                for key, value in content.items():
-                    md_content.append(f"- **{key}**: {value}")
-            else:
-                md_content.append(str(content))
-            md_content.append("")
-    
-    # Special Clauses
-    special_clauses = contract.get('special_clauses', [])
-    if special_clauses:
-        md_content.append("## Special Clauses")
-        for clause in special_clauses:
-            md_content.append(f"### {clause.get('title', 'Untitled Clause')}")
-            md_content.append(clause.get('content', 'Clause content not specified'))
-            md_content.append("")
-    
-    return "\n".join(md_content)
-
-def export_contract(contract: Dict) -> str:
-    """Export contract to file and return the filename"""
-    if not os.path.exists("exports"):
-        os.makedirs("exports")
-    
-    # Generate filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"exports/contract_{timestamp}.md"
-    
-    # Convert and save as Markdown
-    md_content = convert_contract_to_markdown(contract)
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(md_content)
-    
-    return filename
+STALE_SESSION_MESSAGE = "This session was updated in another tab or window. Please retry."
+jobs = JobQueue()
 
-def generate_contract(requirements: str) -> tuple[str, str]:
+def generate_contract(requirements: str, request: gr.Request) -> tuple[str, str]:
     """Generate contract based on user requirements"""
-    global current_contract
-    
-    # Get AI analysis results
-    analysis = assistant.interact_with_ai(requirements, interaction_type="initial")
-    
-    # Generate initial contract
-    current_contract = generator.generate_contract(
-        analysis['template_type'],
-        analysis['basic_info'],
-        [clause['clause_type'] for clause in analysis.get('suggested_clauses', [])]
-    )
-    
-    # Convert contract to markdown for display
-    contract_md = convert_contract_to_markdown(current_contract)
+    try:
+        return _generate_contract(requirements, request.session_hash)
+    except StaleSessionError:
+        return STALE_SESSION_MESSAGE, ""
+
+def _generate_contract(requirements: str, session_id: str) -> tuple[str, str]:
+    with sessions.session(session_id) as state:
+        # Get AI analysis results
+        analysis = assistant.interact_with_ai(requirements, interaction_type="initial", state=state)
+        
+        # Generate initial contract
+        state.contract = generator.generate_contract(
+            analysis['template_type'],
+            analysis['basic_info'],
+            [clause['clause_type'] for clause in analysis.get('suggested_clauses', [])]
+        )
+        
+        # Convert contract to markdown for display
+        contract_md = convert_contract_to_markdown(state.contract)
     
     return json.dumps(analysis, indent=2), contract_md
 
-def modify_contract(modifications: str) -> tuple[str, str]:
+def modify_contract(modifications: str, request: gr.Request) -> tuple[str, str]:
     """Modify existing contract based on user input"""
-    global current_contract
-    
-    if not current_contract:
-        return "No contract to modify", "Please generate a contract first"
-    
-    # Get AI analysis results
-    analysis = assistant.interact_with_ai(modifications)
-    
-    # Apply modifications
-    current_contract = generator.modify_contract(
-        current_contract,
-        analysis.get('modifications', [])
-    )
-    
-    # Convert updated contract to markdown
-    contract_md = convert_contract_to_markdown(current_contract)
+    try:
+        return _modify_contract(modifications, request.session_hash)
+    except StaleSessionError:
+        return STALE_SESSION_MESSAGE, ""
+
+def _modify_contract(modifications: str, session_id: str) -> tuple[str, str]:
+    with sessions.session(session_id) as state:
+        if not state.contract:
+            return "No contract to modify", "Please generate a contract first"
+        
+        # Get AI analysis results
+        analysis = assistant.interact_with_ai(modifications, state=state)
+        
+        # Apply modifications
+        state.contract = generator.modify_contract(
+            state.contract,
+            analysis.get('modifications', [])
+        )
+        
+        # Convert updated contract to markdown
+        contract_md = convert_contract_to_markdown(state.contract)
     
     return json.dumps(analysis, indent=2), contract_md
 
-def export_current_contract() -> str:
-    """Export current contract and return the file path"""
-    if not current_contract:
-        return "No contract to export"
-    
-    filename = export_contract(current_contract)
-    return f"Contract exported to: {filename}"
+def export_current_contract(request: gr.Request) -> tuple[str, str]:
+    """Queue an export of the current contract and return the job id"""
+    state = sessions.get(request.session_hash)
+    if not state.contract:
+        return "No contract to export", ""
+    
+    # Snapshot the contract so later modifications don't affect the export
+    job_id = jobs.submit("export_contract", export_contract_files, copy.deepcopy(state.contract))
+    return f"Export queued as job {job_id}", job_id
+
+def check_export_job(job_id: str):
+    """Stream the export job's status until it finishes"""
+    if not job_id:
+        yield "No export job"
+        return
+    for job in jobs.watch(job_id.strip()):
+        yield format_job(job)
 
-def reset_contract() -> tuple[str, str]:
+def reset_contract(request: gr.Request) -> tuple[str, str]:
     """Reset the current contract"""
-    global current_contract
-    current_contract = None
+    try:
+        with sessions.session(request.session_hash) as state:
+            state.reset()
+    except StaleSessionError:
+        return STALE_SESSION_MESSAGE, ""
     return "", "Contract cleared. Ready to generate new contract."
 
+def session_stats() -> Dict:
+    """Live session count, eviction counters and coalesced LLM requests"""
+    return {**sessions.stats(), 'llm_requests': LLM_REQUESTS.stats()}
+
 # 创建 Gradio 界面
 with gr.Blocks(title="LexCraft Smart Contract System") as demo:
     gr.Markdown("# LexCraft Smart Contract System")
@@ -138,7 +135,11 @@ with gr.Blocks(title="LexCraft Smart Contract System") as demo:
                 )
                 modify_btn = gr.Button("Apply Changes")
                 export_btn = gr.Button("Export Contract")
+                export_job_id = gr.Textbox(label="Export Job ID")
+                export_status = gr.Textbox(label="Export Status", interactive=False)
+                export_status_btn = gr.Button("Check Export Status")
                 reset_btn = gr.Button("Create New Contract")
+                stats_btn = gr.Button("Session Stats")
             
             analysis_output = gr.JSON(label="AI Analysis Results")
         
@@ -161,7 +162,13 @@ with gr.Blocks(title="LexCraft Smart Contract System") as demo:
     export_btn.click(
         export_current_contract,
         inputs=[],
-        outputs=[analysis_output]
+        outputs=[export_status, export_job_id]
+    )
+    
+    export_status_btn.click(
+        check_export_job,
+        inputs=[export_job_id],
+        outputs=[export_status]
     )
     
     reset_btn.click(
@@ -169,6 +176,12 @@ with gr.Blocks(title="LexCraft Smart Contract System") as demo:
         inputs=[],
         outputs=[analysis_output, contract_display]
     )
+    
+    stats_btn.click(
+        session_stats,
+        inputs=[],
+        outputs=[analysis_output]
+    )
 
 if __name__ == "__main__":
-    demo.launch()
+    demo.queue().launch()
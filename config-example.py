@@ -37,4 +37,12 @@ PROMPT_TEMPLATES = {
     Output the information in the following format:
     {format_instructions}
     """
-}
\ No newline at end of file
+}
+# Session storage configuration
+# backend: 'memory' (per process) or 'sqlite' (shared by all app workers on this machine)
+SESSION_CONFIG = {
+    'backend': 'memory',
+    'sqlite_path': 'data/sessions.db',  # Used by the sqlite backend
+    'codec': 'msgpack',  # sqlite backend payload codec: 'msgpack' (requires msgpack) or 'json'; use the same value on every worker
+    'idle_ttl': 3600  # Seconds of inactivity before a session is discarded
+}
@@ -4,31 +4,84 @@ import json
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 from .assistance import ContractAssistant
+from .catalog import CatalogSnapshot
+from .catalog_snapshot import SnapshotRepository
+from .validation import LEASE_VALIDATOR, FieldError, get_template_validator
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.orm import (
     ContractTemplate, 
     ContractStructure, 
-    SpecialClause, 
-    ClauseTranslation,
     get_db_session
 )
+from database.repository import ClauseRepository, TemplateRepository
+from database.template_loader import TemplateGraphLoader
 from dateutil.relativedelta import relativedelta
 import traceback
 
 class ContractGenerator:
     """Responsible for generating and modifying contracts"""
     
-    def __init__(self):
-        """初始化合同生成器"""
-        self.session, _ = get_db_session()
+    def __init__(self, languages: Optional[List[str]] = None, catalog=None):
+        """初始化合同生成器
+
+        Args:
+            languages: 启动时预加载翻译的语言列表，如 ['zh_CN']
+            catalog: 预编译的目录快照（SnapshotFile.catalog），提供时条款、模板和翻译从快照读取，
+                数据库会话只在快照未命中时才创建
+        """
+        self._session = None
+        self._template_graphs = None
+        if catalog is not None and 'clause_rows' in catalog.sections():
+            self.clauses = SnapshotRepository(catalog, lambda: self.session)
+        else:
+            self.clauses = ClauseRepository(self.session)
+        self.catalog = CatalogSnapshot()
+        if catalog is not None:
+            self.catalog.load_from_buffer(catalog, languages)
+        else:
+            for language in languages or []:
+                self.warm_language(language)
+
+    @property
+    def session(self):
+        """数据库会话，首次访问时创建"""
+        if self._session is None:
+            self._session, _ = get_db_session()
+        return self._session
+
+    @property
+    def template_graphs(self) -> TemplateGraphLoader:
+        if self._template_graphs is None:
+            self._template_graphs = TemplateGraphLoader(self.session)
+        return self._template_graphs
+
+    def close(self) -> None:
+        """释放条款仓库的引擎事件监听和数据库会话"""
+        self.clauses.close()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _latest_template(self, template_type: str, province: str) -> Optional[ContractTemplate]:
+        """获取模板的当前版本，有快照时从快照读取"""
+        if isinstance(self.clauses, SnapshotRepository):
+            return self.clauses.get_latest_template(template_type, province)
+        return TemplateRepository(self.session).get_latest(template_type, province)
+
+    def warm_language(self, language: str) -> None:
+        """一次性加载某个语言的全部条款翻译到目录快照"""
+        self.catalog.load_language(self.clauses, language)
     
     def get_available_templates(self, requirements: Dict) -> List[Dict]:
         """获取可用的合同模板"""
         try:
             # 从数据库查询所有模板
             templates = []
-            db_templates = self.session.query(ContractTemplate).all()
+            if isinstance(self.clauses, SnapshotRepository):
+                db_templates = self.clauses.list_templates()
+            else:
+                db_templates = self.session.query(ContractTemplate).all()
             
             for template in db_templates:
                 # 解析 JSON 字段
@@ -210,9 +263,7 @@ class ContractGenerator:
                     
                 if action == 'add':
                     # 获取条款模板
-                    template = self.session.query(SpecialClause).filter_by(
-                        clause_type=target
-                    ).first()
+                    template = self.clauses.get_by_type(target)
                     
                     if template:
                         # 获取变量
@@ -235,9 +286,7 @@ class ContractGenerator:
                                     clause['variables'].update(variables)
                                     
                                     # 重新格式化内容
-                                    template = self.session.query(SpecialClause).filter_by(
-                                        clause_type=target
-                                    ).first()
+                                    template = self.clauses.get_by_type(target)
                                     
                                     if template:
                                         content = template.content
@@ -264,9 +313,7 @@ class ContractGenerator:
     def add_special_clause(self, contract: Dict, clause_type: str, variables: Dict = None) -> Dict:
         """添加特殊条款到合同"""
         # 获取条款模板
-        template = self.session.query(SpecialClause).filter_by(
-            clause_type=clause_type
-        ).first()
+        template = self.clauses.get_by_type(clause_type)
         
         if not template:
             print(f"Warning: Clause template not found: {clause_type}")
@@ -314,20 +361,13 @@ class ContractGenerator:
         relevant_clauses = []
         
         # Query relevant clauses based on different aspects of requirements
+        province = requirements['location']['province']
         if requirements.get('special_requirements', {}).get('pets', {}).get('allowed'):
-            pet_clauses = self.session.query(SpecialClause).filter(
-                SpecialClause.category == 'pets',
-                SpecialClause.province == requirements['location']['province']
-            ).all()
-            relevant_clauses.extend(pet_clauses)
+            relevant_clauses.extend(self.clauses.list_by_category_and_province('pets', province))
         
         # Query clauses based on other special requirements
         for feature in requirements.get('property', {}).get('preferences', []):
-            feature_clauses = self.session.query(SpecialClause).filter(
-                SpecialClause.category == feature,
-                SpecialClause.province == requirements['location']['province']
-            ).all()
-            relevant_clauses.extend(feature_clauses)
+            relevant_clauses.extend(self.clauses.list_by_category_and_province(feature, province))
         
         # Convert to dictionary format
         return [{
@@ -638,9 +678,7 @@ class ContractGenerator:
                     continue
                     
                 # Query relevant clauses
-                clauses = self.session.query(SpecialClause).filter(
-                    SpecialClause.category == category
-                ).all()
+                clauses = self.clauses.list_by_category(category)
                 
                 # Add found clauses
                 for clause in clauses:
@@ -668,9 +706,7 @@ class ContractGenerator:
                 continue
                 
             # Query relevant clauses
-            pref_clauses = self.session.query(SpecialClause).filter(
-                SpecialClause.category == pref
-            ).all()
+            pref_clauses = self.clauses.list_by_category(pref)
             
             # Add found clauses
             for clause in pref_clauses:
@@ -692,9 +728,7 @@ class ContractGenerator:
         if preferences:
             # Query relevant clauses
             for pref in preferences:
-                pref_clauses = self.session.query(SpecialClause).filter(
-                    SpecialClause.category == pref
-                ).all()
+                pref_clauses = self.clauses.list_by_category(pref)
                 
                 # Add found clauses
                 for clause in pref_clauses:
@@ -726,9 +760,7 @@ class ContractGenerator:
         """Fetch required clauses from database"""
         clauses = []
         for category in categories:
-            db_clauses = self.session.query(SpecialClause).filter(
-                SpecialClause.category == category
-            ).all()
+            db_clauses = self.clauses.list_by_category(category)
             clauses.extend([clause.to_dict() for clause in db_clauses])
         return clauses
 
@@ -773,7 +805,7 @@ class ContractGenerator:
             for clause_req in requirements['special_clauses']:
                 clause_type = clause_req.get('type')
                 if clause_type:
-                    clause = self.session.query(SpecialClause).filter_by(clause_type=clause_type).first()
+                    clause = self.clauses.get_by_type(clause_type)
                     if clause:
                         # 处理变量
                         content = clause.content
@@ -792,7 +824,7 @@ class ContractGenerator:
         if 'special_requirements' in requirements:
             for req_type, req_value in requirements['special_requirements'].items():
                 if req_value and not any(clause['type'] == req_type for clause in special_clauses):
-                    clause = self.session.query(SpecialClause).filter_by(clause_type=req_type).first()
+                    clause = self.clauses.get_by_type(req_type)
                     if clause:
                         # 处理变量
                         content = clause.content
@@ -813,9 +845,7 @@ class ContractGenerator:
         """创建特殊条款"""
         try:
             # 从数据库获取条款模板
-            clause_template = self.session.query(SpecialClause).filter_by(
-                clause_type=clause_type
-            ).first()
+            clause_template = self.clauses.get_by_type(clause_type)
             
             if not clause_template:
                 print(f"Warning: Clause template '{clause_type}' not found in database")
@@ -846,9 +876,7 @@ class ContractGenerator:
         """格式化条款内容"""
         try:
             # 从数据库获取条款模板
-            clause_template = self.session.query(SpecialClause).filter_by(
-                clause_type=clause_type
-            ).first()
+            clause_template = self.clauses.get_by_type(clause_type)
             
             if not clause_template:
                 print(f"Warning: Clause template '{clause_type}' not found in database")
@@ -955,48 +983,22 @@ class ContractGenerator:
 
     def _validate_field_values(self, field_values: Dict) -> List[str]:
         """Validate field values"""
-        errors = []
-        
-        # Validate dates
-        if 'start_date' in field_values:
-            try:
-                start_date = datetime.strptime(field_values['start_date'], '%Y-%m-%d')
-                if start_date < datetime.now():
-                    errors.append('Start date cannot be earlier than today')
-            except ValueError:
-                errors.append('Invalid start date format')
-                
-        # Validate amounts
-        if 'rent_amount' in field_values:
-            try:
-                rent = float(field_values['rent_amount'])
-                if rent <= 0:
-                    errors.append('Rent amount must be greater than 0')
-            except ValueError:
-                errors.append('Invalid rent amount format')
-                
-        if 'deposit_amount' in field_values:
-            try:
-                deposit = float(field_values['deposit_amount'])
-                if deposit <= 0:
-                    errors.append('Deposit amount must be greater than 0')
-            except ValueError:
-                errors.append('Invalid deposit amount format')
-                
-        # Validate required fields
-        required_fields = {
-            'city': 'City',
-            'province': 'Province',
-            'rent_amount': 'Rent amount',
-            'start_date': 'Start date',
-            'duration_amount': 'Duration'
-        }
+        return [error.message for error in LEASE_VALIDATOR.validate(field_values)]
+
+    def validate_records(self, template_id: int, records: List[Dict]) -> List[FieldError]:
+        """Validate one or many sets of field values against a template's field rules
         
-        for field, label in required_fields.items():
-            if field not in field_values or not field_values[field]:
-                errors.append(f'{label} cannot be empty')
-                
-        return errors
+        Args:
+            template_id: Contract template id
+            records: Field value dicts, one per contract
+            
+        Returns:
+            Structured errors; FieldError.record is the index into records
+        """
+        graph = self.template_graphs.load(template_id)
+        if graph is None:
+            raise ValueError(f"Template not found: {template_id}")
+        return get_template_validator(graph).validate_batch(records)
 
     def _process_clause_variables(self, clause: Dict, field_values: Dict) -> Dict:
         """Process clause variables"""
@@ -1034,17 +1036,17 @@ class ContractGenerator:
         
         return processed_clause
 
-    def _localize_clause(self, clause: Dict) -> Dict:
+    def _localize_clause(self, clause: Dict, language: str = 'en_US') -> Dict:
         """Localize special clause content"""
-        # Get localized content from database
-        localized = self.session.query(ClauseTranslation).filter_by(
-            clause_id=clause['id'],
-            language='en_US'  # Can be changed based on user preference
-        ).first()
+        # Translations are bulk-loaded once per language into the catalog snapshot
+        if not self.catalog.has_language(language):
+            self.warm_language(language)
         
+        localized = self.catalog.translation(language, clause.get('id'))
         if localized:
-            clause['title'] = localized.title
-            clause['content'] = localized.content
+            title, content = localized
+            clause['title'] = title
+            clause['content'] = content
             
         return clause
 
@@ -1052,7 +1054,7 @@ class ContractGenerator:
         """Create special clause"""
         try:
             # Get special clause from database
-            clause = self.session.query(SpecialClause).filter_by(clause_type=clause_type).first()
+            clause = self.clauses.get_by_type(clause_type)
             if not clause:
                 return None
             
@@ -1104,9 +1106,7 @@ class ContractGenerator:
                 for req_type, req_value in self.requirements['special_requirements'].items():
                     if req_value and not any(clause['type'] == req_type for clause in self.requirements['special_clauses']):
                         # 获取默认变量值
-                        clause = self.session.query(SpecialClause).filter_by(
-                            clause_type=req_type
-                        ).first()
+                        clause = self.clauses.get_by_type(req_type)
                         
                         if clause and clause.variables:
                             default_variables = json.loads(clause.variables)
@@ -1257,7 +1257,7 @@ class ContractGenerator:
             友好的显示名称
         """
         # 从数据库获取显示名称
-        clause = self.session.query(SpecialClause).filter_by(clause_type=clause_type).first()
+        clause = self.clauses.get_by_type(clause_type)
         if clause and clause.display_name:
             return clause.display_name
             
@@ -1276,9 +1276,7 @@ class ContractGenerator:
             更新后的合同
         """
         # 获取条款模板
-        template = self.session.query(SpecialClause).filter_by(
-            clause_type=clause_type
-        ).first()
+        template = self.clauses.get_by_type(clause_type)
         
         if not template:
             print(f"Warning: Clause template not found: {clause_type}")
@@ -1357,11 +1355,8 @@ class ContractGenerator:
             if not province:
                 raise ValueError(f"无法从地址确定省份: {basic_info.get('property', {}).get('address')}")
             
-            # 使用省份信息查询模板
-            template = self.session.query(ContractTemplate).filter_by(
-                type=template_type,
-                province=province
-            ).first()
+            # 使用省份信息查询模板的当前版本
+            template = self._latest_template(template_type, province)
             
             if not template:
                 raise ValueError(f"找不到合同模板: {template_type} (省份: {province})")
@@ -1498,9 +1493,7 @@ class ContractGenerator:
         
         if action == 'add':
             # 获取条款模板
-            template = self.session.query(SpecialClause).filter_by(
-                clause_type=clause_type
-            ).first()
+            template = self.clauses.get_by_type(clause_type)
             
             if template:
                 # 获取变量
@@ -1546,9 +1539,7 @@ class ContractGenerator:
                         clause['variables'].update(new_variables)
                         
                         # 重新格式化内容
-                        template = self.session.query(SpecialClause).filter_by(
-                            clause_type=clause_type
-                        ).first()
+                        template = self.clauses.get_by_type(clause_type)
                         
                         if template:
                             content = template.content
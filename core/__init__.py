@@ -1,4 +1,28 @@
-from .assistance import *
-from .contract import *
-from .database import *
-from .explainer import *
\ No newline at end of file
+# 子模块按需导入：访问 core.ContractAssistant 等名称时才加载对应模块，
+# 避免仅导入 core 的某个子模块时连带加载 openai、SQLAlchemy 等重量级依赖
+import importlib
+
+_EXPORTS = {
+    'ContractAssistant': 'assistance',
+    'load_available_templates': 'assistance',
+    'load_available_clauses': 'assistance',
+    'load_clause_relationships': 'assistance',
+    'ContractProcessor': 'contract',
+    'ContractDatabase': 'database',
+    'ContractExplainer': 'explainer',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -8,97 +8,144 @@ from openai import OpenAI
 
 from database.orm import get_db_session, ClauseKeywordMapping, SpecialClause, ContractTemplate
 from config import DEEPSEEK_CONFIG
+from .singleflight import SingleFlight, prompt_key
+
+# 进程内所有助手共享：相同的并发请求只调用一次 API
+LLM_REQUESTS = SingleFlight()
+
+def load_available_templates(session) -> Dict:
+    """加载所有可用的合同模板"""
+    templates = {}
+    # 从旧到新遍历，同一类型有多个修订版本时保留最新的一个
+    db_templates = session.query(ContractTemplate).order_by(
+        ContractTemplate.created_at.asc().nulls_first(), ContractTemplate.id
+    ).all()
+    for template in db_templates:
+        templates[template.type] = {
+            'id': template.id,
+            'type': template.type,
+            'version': template.version,
+            'description': template.description,
+            'sections': template.sections,
+            'features': template.features
+        }
+    return templates
+
+def load_available_clauses(session) -> Dict:
+    """加载所有可用的特殊条款"""
+    clauses = {}
+    db_clauses = session.query(SpecialClause).all()
+    for clause in db_clauses:
+        clauses[clause.clause_type] = {
+            'title': clause.title,
+            'category': clause.category,
+            'content': clause.content,
+            'variables': clause.variables
+        }
+    return clauses
+
+def load_clause_relationships(session) -> Dict:
+    """加载条款之间的关联关系"""
+    relationships = {}
+    mappings = session.query(ClauseKeywordMapping).all()
+    for mapping in mappings:
+        if mapping.clause_type not in relationships:
+            relationships[mapping.clause_type] = []
+        # 从JSON字段中获取关键词列表
+        keywords = json.loads(mapping.keywords) if isinstance(mapping.keywords, str) else mapping.keywords
+        if isinstance(keywords, list):
+            for keyword in keywords:
+                relationships[mapping.clause_type].append({
+                    'keyword': keyword,
+                    'weight': 1.0  # 默认权重
+                })
+        elif isinstance(keywords, dict):
+            for keyword, weight in keywords.items():
+                relationships[mapping.clause_type].append({
+                    'keyword': keyword,
+                    'weight': float(weight)
+                })
+    return relationships
+
 
 class ContractAssistant:
     """智能合同助手，负责理解用户需求并提供建议"""
     
-    def __init__(self):
+    def __init__(self, catalog=None):
+        """
+        Args:
+            catalog: 预先构建的只读目录（如 SharedCatalog.catalog），提供 templates、clauses、
+                relationships 三个部分；为空时从数据库加载
+        """
         self.client = OpenAI(
             api_key=DEEPSEEK_CONFIG['api_key'],
             base_url=DEEPSEEK_CONFIG['base_url']
         )
-        self.session, _ = get_db_session()
         
         # 加载所有静态资源
-        self.available_templates = self._load_available_templates()
-        self.available_clauses = self._load_available_clauses()
-        self.clause_relationships = self._load_clause_relationships()
+        if catalog is not None:
+            self.session = None
+            self.available_templates = catalog.section('templates')
+            self.available_clauses = catalog.section('clauses')
+            self.clause_relationships = catalog.section('relationships')
+        else:
+            self.session, _ = get_db_session()
+            self.available_templates = self._load_available_templates()
+            self.available_clauses = self._load_available_clauses()
+            self.clause_relationships = self._load_clause_relationships()
         
-        # 初始化会话状态
+        # 初始化会话状态（未传入会话时使用助手自身的状态）
         self.current_contract = None
         self.initial_requirements = None
         self.modification_history = []
         
+        # 静态资源在助手生命周期内不变，首次使用时序列化一次
+        self._static_context_json = None
+        
         # System prompts
         self.initial_system_prompt = self._load_initial_prompt()
         self.modification_system_prompt = self._load_modification_prompt()
 
     def _load_available_templates(self) -> Dict:
         """加载所有可用的合同模板"""
-        templates = {}
-        db_templates = self.session.query(ContractTemplate).all()
-        for template in db_templates:
-            templates[template.type] = {
-                'id': template.id,
-                'type': template.type,
-                'version': template.version,
-                'description': template.description,
-                'sections': template.sections,
-                'features': template.features
-            }
-        return templates
+        return load_available_templates(self.session)
 
     def _load_available_clauses(self) -> Dict:
         """加载所有可用的特殊条款"""
-        clauses = {}
-        db_clauses = self.session.query(SpecialClause).all()
-        for clause in db_clauses:
-            clauses[clause.clause_type] = {
-                'title': clause.title,
-                'category': clause.category,
-                'content': clause.content,
-                'variables': clause.variables
-            }
-        return clauses
+        return load_available_clauses(self.session)
 
     def _load_clause_relationships(self) -> Dict:
         """加载条款之间的关联关系"""
-        relationships = {}
-        mappings = self.session.query(ClauseKeywordMapping).all()
-        for mapping in mappings:
-            if mapping.clause_type not in relationships:
-                relationships[mapping.clause_type] = []
-            # 从JSON字段中获取关键词列表
-            keywords = json.loads(mapping.keywords) if isinstance(mapping.keywords, str) else mapping.keywords
-            if isinstance(keywords, list):
-                for keyword in keywords:
-                    relationships[mapping.clause_type].append({
-                        'keyword': keyword,
-                        'weight': 1.0  # 默认权重
-                    })
-            elif isinstance(keywords, dict):
-                for keyword, weight in keywords.items():
-                    relationships[mapping.clause_type].append({
-                        'keyword': keyword,
-                        'weight': float(weight)
-                    })
-        return relationships
-
-    def _generate_ai_context(self) -> Dict:
-        """生成完整的AI上下文"""
-        context = {
-            "static_resources": {
-                "templates": self.available_templates,
-                "clauses": self.available_clauses,
-                "relationships": self.clause_relationships
-            },
-            "session_state": {
-                "current_contract": self.current_contract,
-                "initial_requirements": self.initial_requirements,
-                "modification_history": self.modification_history
+        return load_clause_relationships(self.session)
+
+    def _static_resources_json(self) -> str:
+        """序列化静态资源（模板、条款、关联关系），结果缓存
+
+        共享目录中的条目按需解码，只在首次调用时全部解码一次。
+        """
+        if self._static_context_json is None:
+            static_resources = {
+                "templates": dict(self.available_templates),
+                "clauses": dict(self.available_clauses),
+                "relationships": dict(self.clause_relationships)
             }
+            self._static_context_json = json.dumps(static_resources, ensure_ascii=False, indent=2)
+        return self._static_context_json
+
+    def _generate_ai_context(self, state=None) -> str:
+        """生成完整的AI上下文 JSON，静态部分复用缓存的序列化结果"""
+        state = state or self
+        session_state = {
+            "current_contract": state.current_contract,
+            "initial_requirements": state.initial_requirements,
+            "modification_history": state.modification_history
         }
-        return context
+        session_json = json.dumps(session_state, ensure_ascii=False, indent=2)
+        # 与 json.dumps({"static_resources": ..., "session_state": ...}, indent=2) 的输出一致
+        return (
+            '{\n  "static_resources": ' + self._static_resources_json().replace('\n', '\n  ')
+            + ',\n  "session_state": ' + session_json.replace('\n', '\n  ') + '\n}'
+        )
 
     def _load_initial_prompt(self) -> str:
         """加载初始需求分析的system prompt"""
@@ -212,9 +259,17 @@ Remember to:
 4. Validate all values against contract rules
 """
 
-    def interact_with_ai(self, user_input: str, interaction_type: str = "modification") -> Dict:
-        """与AI交互的统一接口"""
-        context = self._generate_ai_context()
+    def interact_with_ai(self, user_input: str, interaction_type: str = "modification",
+                         state=None) -> Dict:
+        """与AI交互的统一接口
+
+        Args:
+            user_input: 用户输入
+            interaction_type: "initial" 或 "modification"
+            state: 调用方的会话状态（SessionState），为空时使用助手自身的状态
+        """
+        state = state or self
+        context_str = self._generate_ai_context(state)
         
         # 根据交互类型选择不同的system prompt
         system_prompt = (
@@ -223,7 +278,6 @@ Remember to:
         )
         
         # 将上下文添加到system prompt
-        context_str = json.dumps(context, ensure_ascii=False, indent=2)
         full_prompt = f"{system_prompt}\n\nContext:\n{context_str}"
         
         messages = [
@@ -231,7 +285,25 @@ Remember to:
             {"role": "user", "content": user_input}
         ]
         
-        # 调用AI API
+        # 调用AI API；与正在进行的相同请求合并，各调用方得到独立的结果副本
+        key = prompt_key(DEEPSEEK_CONFIG['model'], messages)
+        result, _ = LLM_REQUESTS.do(key, lambda: self._complete(messages))
+        
+        # 更新会话状态
+        if interaction_type == "initial":
+            state.initial_requirements = result
+        else:
+            self._apply_modifications(result, state)
+            state.modification_history.append({
+                "user_input": user_input,
+                "ai_response": result,
+                "timestamp": datetime.now().isoformat()
+            })
+        
+        return result
+
+    def _complete(self, messages: List[Dict]) -> Dict:
+        """调用AI API并解析JSON响应"""
         response = self.client.chat.completions.create(
             model=DEEPSEEK_CONFIG['model'],
             messages=messages,
@@ -250,23 +322,11 @@ Remember to:
             if "```" in content:
                 content = content.split("```")[0]
         content = content.strip()
-        result = json.loads(content)
-        
-        # 更新会话状态
-        if interaction_type == "initial":
-            self.initial_requirements = result
-        else:
-            self._apply_modifications(result)
-            self.modification_history.append({
-                "user_input": user_input,
-                "ai_response": result,
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        return result
+        return json.loads(content)
 
-    def _apply_modifications(self, response: Dict) -> None:
+    def _apply_modifications(self, response: Dict, state=None) -> None:
         """应用AI建议的修改"""
+        state = state or self
         if not isinstance(response, dict):
             return
             
@@ -283,36 +343,36 @@ Remember to:
                 continue
                 
             # 更新当前合同状态
-            if self.current_contract is not None:
+            if state.current_contract is not None:
                 if mod['type'] == 'basic_info':
                     target = mod.get('target', {})
                     if isinstance(target, dict):
                         section = target.get('section')
                         field = target.get('field')
                         if section and field:
-                            if 'sections' not in self.current_contract:
-                                self.current_contract['sections'] = {}
-                            if section not in self.current_contract['sections']:
-                                self.current_contract['sections'][section] = {}
-                            self.current_contract['sections'][section][field] = mod['value']
+                            if 'sections' not in state.current_contract:
+                                state.current_contract['sections'] = {}
+                            if section not in state.current_contract['sections']:
+                                state.current_contract['sections'][section] = {}
+                            state.current_contract['sections'][section][field] = mod['value']
                         
                 elif mod['type'] == 'clause':
-                    if 'special_clauses' not in self.current_contract:
-                        self.current_contract['special_clauses'] = []
+                    if 'special_clauses' not in state.current_contract:
+                        state.current_contract['special_clauses'] = []
                     
                     if mod['action'] == 'add':
-                        self.current_contract['special_clauses'].append({
+                        state.current_contract['special_clauses'].append({
                             'type': mod['target'],
                             'content': mod.get('value', {}).get('content', ''),
                             'variables': mod.get('value', {}).get('variables', {})
                         })
                     elif mod['action'] == 'remove':
-                        self.current_contract['special_clauses'] = [
-                            c for c in self.current_contract['special_clauses']
+                        state.current_contract['special_clauses'] = [
+                            c for c in state.current_contract['special_clauses']
                             if c['type'] != mod['target']
                         ]
                     elif mod['action'] == 'modify':
-                        for clause in self.current_contract['special_clauses']:
+                        for clause in state.current_contract['special_clauses']:
                             if clause['type'] == mod['target']:
                                 clause.update(mod.get('value', {}))
 
@@ -343,10 +403,11 @@ Remember to:
         
         return contract
 
-    def _update_clause_variables(self, variables: Dict) -> None:
+    def _update_clause_variables(self, variables: Dict, state=None) -> None:
         """更新条款变量并重新格式化内容"""
+        state = state or self
         for clause_type, values in variables.items():
-            for clause in self.current_contract['special_clauses']:
+            for clause in state.current_contract['special_clauses']:
                 if clause['type'] == clause_type:
                     # 更新变量
                     clause['variables'].update(values)
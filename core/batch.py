@@ -0,0 +1,246 @@
+import asyncio
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Set
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 输入记录格式（JSONL 每行一个对象，CSV 每行一条）：
+#   - requirements: 自然语言需求，经 LLM 分析后生成合同
+#   - template_type + basic_info (+ clauses): 结构化记录，跳过 LLM 直接生成（快速路径）
+# CSV 中 basic_info 可用点号列名展开，如 basic_info.property.address；clauses 以分号分隔。
+# id 列可选，缺省时使用记录序号；断点续传依赖 id 稳定。
+
+
+def _set_path(target: Dict, dotted: str, value) -> None:
+    keys = dotted.split('.')
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+
+def _csv_record(row: Dict) -> Dict:
+    """将 CSV 行转换为与 JSONL 相同的记录结构"""
+    record = {}
+    for column, value in row.items():
+        if column is None or value is None or value == '':
+            continue
+        column = column.strip()
+        if column == 'clauses':
+            record['clauses'] = [item.strip() for item in value.split(';') if item.strip()]
+        elif column == 'basic_info':
+            record['basic_info'] = json.loads(value)
+        else:
+            _set_path(record, column, value)
+    return record
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """逐条读取 CSV 或 JSONL 输入，不一次性载入整个文件"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.lower().endswith('.csv'):
+            for index, row in enumerate(csv.DictReader(f), 1):
+                record = _csv_record(row)
+                record.setdefault('id', str(index))
+                yield record
+        else:
+            index = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                index += 1
+                record = json.loads(line)
+                record['id'] = str(record.get('id', index))
+                yield record
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """读取已有输出文件中成功完成的记录 id，用于断点续传"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # 上次中断时可能留下不完整的最后一行
+                continue
+            if entry.get('status') == 'ok':
+                done.add(str(entry['id']))
+            else:
+                done.discard(str(entry['id']))
+    return done
+
+
+class BatchGenerator:
+    """批量生成合同
+
+    LLM 需求分析在受并发上限约束的异步任务中执行；合同生成共用一个 ContractGenerator
+    （及其数据库会话），因此在单独的单线程执行器中串行运行。每条结果完成后立即追加到
+    输出 JSONL，可选地写出 Markdown 文件；重新运行时跳过输出中已成功的记录。
+    """
+
+    def __init__(self, input_path: str, output_path: str, markdown_dir: Optional[str] = None,
+                 concurrency: int = 4, catalog=None, resume: bool = True):
+        """
+        Args:
+            input_path: CSV 或 JSONL 输入文件
+            output_path: 结果 JSONL 文件（同时作为断点续传的记录）
+            markdown_dir: 提供时为每份合同写出 <id>.md
+            concurrency: 同时进行的 LLM 请求上限
+            catalog: 预编译的目录快照（SnapshotFile.catalog），为空时从数据库加载
+            resume: 是否跳过输出文件中已成功的记录
+        """
+        self.input_path = input_path
+        self.output_path = output_path
+        self.markdown_dir = markdown_dir
+        self.concurrency = max(1, concurrency)
+        self.catalog = catalog
+        self.resume = resume
+        self.stats = {'total': 0, 'skipped': 0, 'succeeded': 0, 'failed': 0,
+                      'llm_calls': 0, 'fast_path': 0, 'llm_seconds': 0.0, 'generate_seconds': 0.0}
+        self._assistant = None
+        self._generator = None
+
+    @property
+    def assistant(self):
+        # 全部为结构化记录时无需创建 OpenAI 客户端
+        if self._assistant is None:
+            from core.assistance import ContractAssistant
+            self._assistant = ContractAssistant(catalog=self.catalog)
+        return self._assistant
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            from core.ContractGenerator import ContractGenerator
+            # 目录快照包含完整的条款和模板行时，生成过程直接读取快照，不再查询数据库
+            catalog = self.catalog if self.catalog is not None and 'clause_rows' in self.catalog.sections() else None
+            self._generator = ContractGenerator(catalog=catalog)
+        return self._generator
+
+    def run(self) -> Dict:
+        """执行批量生成并返回统计信息"""
+        started = time.perf_counter()
+        try:
+            asyncio.run(self._run())
+        finally:
+            if self._generator is not None:
+                self._generator.close()
+                self._generator = None
+        seconds = time.perf_counter() - started
+        processed = self.stats['succeeded'] + self.stats['failed']
+        self.stats['seconds'] = round(seconds, 2)
+        self.stats['records_per_second'] = round(processed / seconds, 2) if seconds else 0.0
+        self.stats['llm_seconds'] = round(self.stats['llm_seconds'], 2)
+        self.stats['generate_seconds'] = round(self.stats['generate_seconds'], 2)
+        print(f"\n批量生成完成: {self.stats}")
+        return self.stats
+
+    async def _run(self) -> None:
+        done = completed_ids(self.output_path) if self.resume else set()
+        directory = os.path.dirname(os.path.abspath(self.output_path))
+        os.makedirs(directory, exist_ok=True)
+        if self.markdown_dir:
+            os.makedirs(self.markdown_dir, exist_ok=True)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # 合同生成共用同一个数据库会话，只能串行执行
+        generate_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lexcraft-generate")
+        # 限制同时在途的记录数，输入按需读取
+        max_pending = self.concurrency * 2
+        pending = set()
+        mode = 'a' if self.resume else 'w'
+
+        try:
+            with open(self.output_path, mode, encoding='utf-8') as output:
+                for record in read_records(self.input_path):
+                    self.stats['total'] += 1
+                    if record['id'] in done:
+                        self.stats['skipped'] += 1
+                        continue
+                    pending.add(asyncio.ensure_future(
+                        self._process(record, semaphore, generate_executor, output)
+                    ))
+                    if len(pending) >= max_pending:
+                        _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if pending:
+                    await asyncio.wait(pending)
+        finally:
+            generate_executor.shutdown(wait=True)
+
+    async def _process(self, record: Dict, semaphore: asyncio.Semaphore,
+                       generate_executor: ThreadPoolExecutor, output) -> None:
+        """分析并生成单条记录，结果立即写入输出"""
+        record_id = record['id']
+        started = time.perf_counter()
+        entry = {'id': record_id}
+        try:
+            if record.get('template_type') and isinstance(record.get('basic_info'), dict):
+                entry['source'] = 'structured'
+                self.stats['fast_path'] += 1
+                template_type = record['template_type']
+                basic_info = record['basic_info']
+                clauses = record.get('clauses', [])
+            elif record.get('requirements'):
+                entry['source'] = 'llm'
+                assistant = self.assistant
+                async with semaphore:
+                    llm_started = time.perf_counter()
+                    requirements = await asyncio.to_thread(self._analyze, assistant, record_id,
+                                                          record['requirements'])
+                    self.stats['llm_seconds'] += time.perf_counter() - llm_started
+                self.stats['llm_calls'] += 1
+                entry['requirements'] = requirements
+                template_type = requirements['template_type']
+                basic_info = requirements['basic_info']
+                clauses = [clause['clause_type'] for clause in requirements.get('suggested_clauses', [])]
+            else:
+                raise ValueError("记录缺少 requirements，或缺少 template_type 和 basic_info")
+
+            loop = asyncio.get_running_loop()
+            generate_started = time.perf_counter()
+            contract = await loop.run_in_executor(
+                generate_executor, self.generator.generate_contract, template_type, basic_info, clauses
+            )
+            self.stats['generate_seconds'] += time.perf_counter() - generate_started
+            if not contract:
+                raise ValueError("合同生成失败")
+
+            if self.markdown_dir:
+                entry['markdown'] = self._write_markdown(record_id, contract)
+            entry['status'] = 'ok'
+            entry['contract'] = contract
+            self.stats['succeeded'] += 1
+        except Exception as e:
+            entry['status'] = 'failed'
+            entry['error'] = f"{type(e).__name__}: {e}"
+            self.stats['failed'] += 1
+
+        entry['seconds'] = round(time.perf_counter() - started, 3)
+        output.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        output.flush()
+        processed = self.stats['succeeded'] + self.stats['failed']
+        print(f"[{processed}] {record_id}: {entry['status']}"
+              + (f" ({entry['error']})" if entry['status'] == 'failed' else ""))
+
+    @staticmethod
+    def _analyze(assistant, record_id: str, requirements: str) -> Dict:
+        from core.session import SessionState
+        # 每条记录使用独立的会话状态，避免并发请求互相覆盖助手状态
+        return assistant.interact_with_ai(requirements, interaction_type="initial",
+                                          state=SessionState(record_id))
+
+    def _write_markdown(self, record_id: str, contract: Dict) -> str:
+        from core.exporter import convert_contract_to_markdown
+        name = re.sub(r'[^\w.-]+', '_', record_id) or 'contract'
+        path = os.path.join(self.markdown_dir, f"{name}.md")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(convert_contract_to_markdown(contract))
+        return path
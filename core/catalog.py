@@ -0,0 +1,145 @@
+from string import Formatter
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+import json
+
+
+class ClauseTemplate(NamedTuple):
+    """预编译的条款模板"""
+    id: int
+    clause_type: str
+    title: Optional[str]
+    category: Optional[str]
+    content: str
+    variables: Tuple[str, ...]
+    placeholders: Tuple[str, ...]
+
+
+def _parse_variables(variables) -> Tuple[str, ...]:
+    """将 variables 字段（JSON 字符串、列表或字典）统一为变量名元组"""
+    if isinstance(variables, str):
+        try:
+            variables = json.loads(variables)
+        except json.JSONDecodeError:
+            return ()
+    if isinstance(variables, (list, tuple, dict)):
+        return tuple(str(name) for name in variables)
+    return ()
+
+
+def compile_clause_template(clause_id: int, clause_type: str, title: Optional[str],
+                            category: Optional[str], content: Optional[str],
+                            variables=None) -> ClauseTemplate:
+    """解析条款内容中的占位符，生成可直接渲染的条款模板"""
+    content = content or ''
+    try:
+        placeholders = tuple(dict.fromkeys(
+            name for _, name, _, _ in Formatter().parse(content) if name
+        ))
+    except ValueError:
+        # 内容中存在不成对的大括号，无法作为格式化模板解析
+        placeholders = ()
+    return ClauseTemplate(
+        id=clause_id,
+        clause_type=clause_type,
+        title=title,
+        category=category,
+        content=content,
+        variables=_parse_variables(variables),
+        placeholders=placeholders
+    )
+
+
+class CatalogSnapshot:
+    """合同目录快照：条款模板及其各语言翻译的内存视图"""
+
+    def __init__(self):
+        self.clauses: Dict[str, ClauseTemplate] = {}
+        self.clauses_by_id: Dict[int, ClauseTemplate] = {}
+        # language -> {clause_id: (title, content)}
+        self.translations: Dict[str, Dict[int, Tuple[str, str]]] = {}
+        # language -> {clause_type: ClauseTemplate}
+        self.localized_clauses: Dict[str, Dict[str, ClauseTemplate]] = {}
+        self._clauses_loaded = False
+
+    def load_clauses(self, repository) -> None:
+        """一次查询加载全部条款模板"""
+        self.clauses.clear()
+        self.clauses_by_id.clear()
+        for clause in repository.list_all():
+            template = compile_clause_template(
+                clause.id, clause.clause_type, clause.title,
+                clause.category, clause.content, clause.variables
+            )
+            self.clauses[clause.clause_type] = template
+            self.clauses_by_id[clause.id] = template
+        self._clauses_loaded = True
+
+    def load_language(self, repository, language: str) -> Dict[int, Tuple[str, str]]:
+        """一次查询加载某个语言的全部翻译，并生成翻译后的条款模板"""
+        if not self._clauses_loaded:
+            self.load_clauses(repository)
+
+        translations = {
+            row.clause_id: (row.title, row.content)
+            for row in repository.list_translations(language)
+        }
+        self._set_language(language, translations)
+        return translations
+
+    def _set_language(self, language: str, translations: Dict[int, Tuple[str, str]]) -> None:
+        """保存某个语言的翻译并生成翻译后的条款模板"""
+        localized = {}
+        for clause_id, (title, content) in translations.items():
+            base = self.clauses_by_id.get(clause_id)
+            if base is None:
+                continue
+            localized[base.clause_type] = compile_clause_template(
+                base.id, base.clause_type, title or base.title,
+                base.category, content or base.content, base.variables
+            )
+
+        self.translations[language] = translations
+        self.localized_clauses[language] = localized
+
+    def load_from_buffer(self, catalog, languages: Optional[Iterable[str]] = None) -> None:
+        """从预编译的目录快照（CatalogBuffer）加载条款模板和翻译，不访问数据库
+
+        Args:
+            catalog: 含 render_plans 和 translations 部分的 CatalogBuffer
+            languages: 需要加载的语言，为空时加载快照中的全部语言
+        """
+        self.clauses.clear()
+        self.clauses_by_id.clear()
+        plans = catalog.section('render_plans')
+        for clause_type in plans:
+            plan = plans[clause_type]
+            template = ClauseTemplate(**{
+                **plan,
+                'variables': tuple(plan['variables']),
+                'placeholders': tuple(plan['placeholders'])
+            })
+            self.clauses[clause_type] = template
+            self.clauses_by_id[template.id] = template
+        self._clauses_loaded = True
+
+        available = catalog.section('translations')
+        for language in (languages if languages is not None else available):
+            if language not in available:
+                continue
+            translations = {
+                int(clause_id): tuple(entry)
+                for clause_id, entry in available[language].items()
+            }
+            self._set_language(language, translations)
+
+    def has_language(self, language: str) -> bool:
+        return language in self.translations
+
+    def translation(self, language: str, clause_id: int) -> Optional[Tuple[str, str]]:
+        """获取条款翻译 (title, content)，未加载或不存在时返回 None"""
+        return self.translations.get(language, {}).get(clause_id)
+
+    def localized_clause(self, language: str, clause_type: str) -> Optional[ClauseTemplate]:
+        """获取翻译后的条款模板，无翻译时回退到原始模板"""
+        localized = self.localized_clauses.get(language, {}).get(clause_type)
+        return localized or self.clauses.get(clause_type)
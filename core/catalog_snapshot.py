@@ -0,0 +1,294 @@
+import hashlib
+import json
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import func, select
+
+from database.orm import (
+    ContractTemplate,
+    SpecialClause,
+    ClauseTranslation,
+    ClauseKeywordMapping,
+    get_db_session
+)
+from database.repository import ClauseRepository, TemplateRepository
+from .catalog import compile_clause_template
+from .shared_catalog import CatalogBuffer, build_catalog_sections, pack_catalog
+
+# 快照格式版本，格式变化时递增，旧快照将被拒绝
+SNAPSHOT_FORMAT = 2
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "catalog.snapshot"
+)
+
+# 参与指纹计算的表
+FINGERPRINT_TABLES = (ContractTemplate, SpecialClause, ClauseTranslation, ClauseKeywordMapping)
+
+
+def _content_digest(session, model) -> str:
+    """逐行哈希表中全部列的内容（按 id 排序），用于没有 updated_at 的表"""
+    digest = hashlib.sha256()
+    stmt = select(*model.__table__.columns).order_by(model.id).execution_options(yield_per=1000)
+    for row in session.execute(stmt):
+        digest.update(json.dumps(list(row), ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def database_fingerprint(session) -> str:
+    """计算目录数据的版本指纹
+
+    有 updated_at 的表比较行数、最大 id 和最后修改时间；没有 updated_at 的表
+    （条款、翻译、关键词）哈希全部行内容，原地修改条款文本也会改变指纹。
+    """
+    parts = []
+    for model in FINGERPRINT_TABLES:
+        if hasattr(model, 'updated_at'):
+            row = session.execute(select(func.count(model.id), func.max(model.id), func.max(model.updated_at))).one()
+            parts.append([model.__tablename__, *[str(value) if value is not None else None for value in row]])
+        else:
+            parts.append([model.__tablename__, _content_digest(session, model)])
+    return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+
+# 快照中保存的模板行不含时间戳列
+TEMPLATE_ROW_EXCLUDE = ('created_at', 'updated_at')
+
+
+def _row(obj, exclude=()) -> Dict:
+    return {column.name: getattr(obj, column.name) for column in obj.__table__.columns if column.name not in exclude}
+
+
+def template_row_key(template_type: str, province: Optional[str]) -> str:
+    return f"{template_type}|{province or ''}"
+
+
+def build_snapshot_sections(session, languages: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """读取快照所需的全部目录数据
+
+    包括 ContractAssistant 使用的模板、条款和关键词关系，以及 ContractGenerator
+    使用的条款渲染计划、完整条款行、模板行（及各 (类型, 省份) 当前版本的索引）和各语言翻译。
+    """
+    sections = build_catalog_sections(session)
+
+    render_plans = {}
+    clause_rows = {}
+    clause_types = {}
+    for clause in session.query(SpecialClause).order_by(SpecialClause.id):
+        plan = compile_clause_template(
+            clause.id, clause.clause_type, clause.title,
+            clause.category, clause.content, clause.variables
+        )
+        render_plans[clause.clause_type] = plan._asdict()
+        clause_rows[clause.clause_type] = _row(clause)
+        clause_types[clause.id] = clause.clause_type
+    sections['render_plans'] = render_plans
+    sections['clause_rows'] = clause_rows
+
+    # 从旧到新遍历，latest_templates 中每个 (类型, 省份) 最终指向当前版本
+    template_rows = {}
+    latest_templates = {}
+    oldest_first = (ContractTemplate.created_at.asc().nulls_first(), ContractTemplate.id.asc())
+    for template in session.query(ContractTemplate).order_by(*oldest_first):
+        template_rows[template.id] = _row(template, TEMPLATE_ROW_EXCLUDE)
+        latest_templates[template_row_key(template.type, template.province)] = template.id
+    sections['template_rows'] = template_rows
+    sections['latest_templates'] = latest_templates
+
+    if languages is None:
+        languages = [row[0] for row in session.query(ClauseTranslation.language).distinct() if row[0]]
+    translations = {}
+    for language in languages:
+        rows = session.query(ClauseTranslation).filter(ClauseTranslation.language == language)
+        translations[language] = {
+            str(row.clause_id): [row.title, row.content]
+            for row in rows if row.clause_id in clause_types
+        }
+    sections['translations'] = translations
+    return sections
+
+
+def write_snapshot(path: str, session, languages: Optional[Iterable[str]] = None) -> Dict:
+    """从数据库构建快照并原子写入 path，返回快照元数据"""
+    sections = build_snapshot_sections(session, languages)
+    meta = {
+        'format': SNAPSHOT_FORMAT,
+        'created_at': time.time(),
+        'db_fingerprint': database_fingerprint(session),
+        'counts': {name: len(entries) for name, entries in sections.items()}
+    }
+    data = pack_catalog(sections, meta)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    meta['bytes'] = len(data)
+    return meta
+
+
+class SnapshotFile:
+    """以只读 mmap 打开的目录快照
+
+    各 worker 映射同一个文件，数据页由操作系统页缓存共享；
+    catalog 可直接传给 ContractAssistant 和 ContractGenerator。
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.catalog = CatalogBuffer(self._mmap)
+        except BaseException:
+            self._file.close()
+            raise
+        self.meta = self.catalog.meta
+        if self.meta.get('format') != SNAPSHOT_FORMAT:
+            self.close()
+            raise ValueError(f"快照格式 {self.meta.get('format')} 与当前版本 {SNAPSHOT_FORMAT} 不兼容")
+        # None 表示尚未校验
+        self.stale: Optional[bool] = None
+
+    def verify(self, session=None) -> bool:
+        """比较快照与当前数据库的指纹，返回快照是否仍然有效"""
+        own_session = session is None
+        if own_session:
+            session, _ = get_db_session()
+        try:
+            current = database_fingerprint(session)
+        finally:
+            if own_session:
+                session.close()
+        self.stale = current != self.meta.get('db_fingerprint')
+        return not self.stale
+
+    def verify_in_background(self, on_stale: Optional[Callable[['SnapshotFile'], None]] = None) -> threading.Thread:
+        """在后台线程中校验快照，过期时打印警告并调用 on_stale"""
+        def run():
+            try:
+                if not self.verify():
+                    print(f"Warning: catalog snapshot {self.path} is older than the database; "
+                          f"rebuild it with tools/build_catalog_snapshot.py")
+                    if on_stale:
+                        on_stale(self)
+            except Exception as e:
+                print(f"Error verifying catalog snapshot: {str(e)}")
+
+        thread = threading.Thread(target=run, name="catalog-snapshot-verify", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        self.catalog.release()
+        self._mmap.close()
+        self._file.close()
+
+
+class SnapshotRepository:
+    """从目录快照提供条款和模板查询，接口与 ClauseRepository 相同
+
+    条款和模板行在首次访问时解码为不属于任何会话的 ORM 对象并缓存。
+    按类型或 (类型, 省份) 查询未命中时回退到数据库（快照生成后新增的数据），
+    数据库会话只在第一次回退时通过 session_factory 创建。
+    """
+
+    def __init__(self, catalog, session_factory: Callable):
+        self._clause_rows = catalog.section('clause_rows')
+        self._template_rows = catalog.section('template_rows')
+        self._latest_templates = catalog.section('latest_templates')
+        self._session_factory = session_factory
+        self._clauses: Dict[str, SpecialClause] = {}
+        self._templates: Dict[str, ContractTemplate] = {}
+        self._by_category: Optional[Dict[str, List[str]]] = None
+        self._repository: Optional[ClauseRepository] = None
+        self.stats = {'snapshot_hits': 0, 'db_fallbacks': 0}
+
+    def _db(self) -> ClauseRepository:
+        if self._repository is None:
+            self._repository = ClauseRepository(self._session_factory())
+        return self._repository
+
+    def _clause(self, clause_type: str) -> SpecialClause:
+        clause = self._clauses.get(clause_type)
+        if clause is None:
+            clause = self._clauses[clause_type] = SpecialClause(**self._clause_rows[clause_type])
+        return clause
+
+    def _category_index(self) -> Dict[str, List[str]]:
+        if self._by_category is None:
+            index = {}
+            for clause_type in self._clause_rows:
+                index.setdefault(self._clause(clause_type).category, []).append(clause_type)
+            self._by_category = index
+        return self._by_category
+
+    def get_by_type(self, clause_type: str) -> Optional[SpecialClause]:
+        if clause_type in self._clause_rows:
+            self.stats['snapshot_hits'] += 1
+            return self._clause(clause_type)
+        self.stats['db_fallbacks'] += 1
+        return self._db().get_by_type(clause_type)
+
+    def list_by_category(self, category: str) -> List[SpecialClause]:
+        # 快照包含完整的条款表，列表查询直接以快照为准
+        self.stats['snapshot_hits'] += 1
+        return [self._clause(clause_type) for clause_type in self._category_index().get(category, [])]
+
+    def list_by_category_and_province(self, category: str, province: str) -> List[SpecialClause]:
+        return [clause for clause in self.list_by_category(category) if clause.province == province]
+
+    def list_all(self) -> List[SpecialClause]:
+        self.stats['snapshot_hits'] += 1
+        return sorted((self._clause(clause_type) for clause_type in self._clause_rows), key=lambda c: c.id)
+
+    def list_translations(self, language: str):
+        # 快照中的翻译已由 CatalogSnapshot.load_from_buffer 加载，这里只处理快照中没有的语言
+        self.stats['db_fallbacks'] += 1
+        return self._db().list_translations(language)
+
+    def _template(self, key: str) -> ContractTemplate:
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = ContractTemplate(**self._template_rows[key])
+        return template
+
+    def get_latest_template(self, template_type: str, province: str) -> Optional[ContractTemplate]:
+        """获取某类型、省份模板的当前版本"""
+        key = template_row_key(template_type, province)
+        if key in self._latest_templates:
+            self.stats['snapshot_hits'] += 1
+            return self._template(str(self._latest_templates[key]))
+        self.stats['db_fallbacks'] += 1
+        return TemplateRepository(self._db().session).get_latest(template_type, province)
+
+    def list_templates(self) -> List[ContractTemplate]:
+        """全部模板（含历史版本），按 id 排序"""
+        self.stats['snapshot_hits'] += 1
+        return [self._template(key) for key in sorted(self._template_rows, key=int)]
+
+    def close(self) -> None:
+        """移除回退查询所用仓库在引擎上的事件监听"""
+        if self._repository is not None:
+            self._repository.close()
+
+    def cache_stats(self) -> Dict:
+        stats = dict(self.stats)
+        if self._repository is not None:
+            stats['db'] = self._repository.cache_stats()
+        return stats
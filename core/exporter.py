@@ -0,0 +1,280 @@
+import os
+import sys
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import Flowable, PageBreak, Paragraph, SimpleDocTemplate
+from pdf_processor.generator import get_styles
+
+EXPORT_DIR = "exports"
+
+
+def convert_contract_to_markdown(contract: Dict) -> str:
+    """Convert contract to Markdown format"""
+    md_content = []
+
+    # Title
+    md_content.append("# Lease Agreement")
+    md_content.append(f"*Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n")
+
+    # Basic Information
+    md_content.append("## Contract Information")
+    md_content.append(f"- Version: {contract.get('version', 'N/A')}")
+    md_content.append(f"- Type: {contract.get('type', 'N/A')}\n")
+
+    # Sections
+    for section, content in contract.get('sections', {}).items():
+        if content:
+            md_content.append(f"## {section.title()}")
+            if isinstance(content, dict):
+                for key, value in content.items():
+                    md_content.append(f"- **{key}**: {value}")
+            else:
+                md_content.append(str(content))
+            md_content.append("")
+
+    # Special Clauses
+    special_clauses = contract.get('special_clauses', [])
+    if special_clauses:
+        md_content.append("## Special Clauses")
+        for clause in special_clauses:
+            md_content.append(f"### {clause.get('title', 'Untitled Clause')}")
+            md_content.append(clause.get('content', 'Clause content not specified'))
+            md_content.append("")
+
+    return "\n".join(md_content)
+
+
+def export_contract_files(contract: Dict, formats: Sequence[str] = ("md", "pdf"),
+                          progress: Optional[Callable] = None) -> List[str]:
+    """将单份合同导出为 formats 中的各个文件，返回文件路径列表（可作为后台任务运行）"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    stem = os.path.join(EXPORT_DIR, f"contract_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+    paths = []
+    for index, fmt in enumerate(formats):
+        if progress:
+            progress(index, len(formats), f"Writing {fmt}")
+        path = f"{stem}.{fmt}"
+        tmp_path = _temp_output(path)
+        try:
+            if fmt == "md":
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(convert_contract_to_markdown(contract))
+            elif fmt == "pdf":
+                write_contract_pdf(contract, tmp_path)
+            else:
+                raise ValueError(f"不支持的导出格式: {fmt}")
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        paths.append(path)
+    if progress:
+        progress(len(formats), len(formats), "Done")
+    return paths
+
+
+def _text(value) -> str:
+    """转义文本中的标记字符并保留换行"""
+    return escape(str(value)).replace("\n", "<br/>")
+
+
+def contract_story(contract: Dict) -> List[Flowable]:
+    """生成单份合同的 PDF 内容，结构与 Markdown 导出一致"""
+    styles = get_styles()
+    story = [
+        Paragraph("Lease Agreement", styles['title']),
+        Paragraph(f"Version: {_text(contract.get('version', 'N/A'))}", styles['body']),
+        Paragraph(f"Type: {_text(contract.get('type', 'N/A'))}", styles['body']),
+    ]
+
+    for section, content in contract.get('sections', {}).items():
+        if not content:
+            continue
+        story.append(Paragraph(_text(section.title()), styles['heading']))
+        if isinstance(content, dict):
+            for key, value in content.items():
+                story.append(Paragraph(f"<b>{_text(key)}</b>: {_text(value)}", styles['body']))
+        else:
+            story.append(Paragraph(_text(content), styles['body']))
+
+    special_clauses = contract.get('special_clauses', [])
+    if special_clauses:
+        story.append(Paragraph("Special Clauses", styles['heading']))
+        for clause in special_clauses:
+            story.append(Paragraph(_text(clause.get('title', 'Untitled Clause')), styles['heading']))
+            story.append(Paragraph(_text(clause.get('content', 'Clause content not specified')), styles['body']))
+    return story
+
+
+def _new_doc(target) -> SimpleDocTemplate:
+    return SimpleDocTemplate(
+        target,
+        pagesize=letter,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72,
+        pageCompression=1
+    )
+
+
+def write_contract_pdf(contract: Dict, target) -> int:
+    """将单份合同渲染为 PDF，target 可以是路径或二进制文件对象，返回页数"""
+    doc = _new_doc(target)
+    doc.build(contract_story(contract))
+    return doc.page
+
+
+class _Bookmark(Flowable):
+    """在当前页添加书签和目录项，不占用版面"""
+
+    def __init__(self, key: str, title: str):
+        super().__init__()
+        self.key = key
+        self.title = title
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        self.canv.bookmarkPage(self.key)
+        self.canv.addOutlineEntry(self.title, self.key, level=0)
+
+
+class _LazyStory(list):
+    """按需展开的 flowable 列表
+
+    ReportLab 逐个消费列表头部的 flowable；列表为空时才从迭代器取出下一份合同的内容，
+    因此任一时刻内存中只有一份合同的 flowable。
+    """
+
+    def __init__(self, parts: Iterator[List[Flowable]]):
+        super().__init__()
+        self._parts = parts
+
+    def __len__(self):
+        while not list.__len__(self):
+            part = next(self._parts, None)
+            if part is None:
+                break
+            self.extend(part)
+        return list.__len__(self)
+
+
+def _default_name(contract: Dict, index: int) -> str:
+    contract_id = contract.get('id') or contract.get('contract_id')
+    return f"contract_{index + 1:04d}" + (f"_{contract_id}" if contract_id else "")
+
+
+def _temp_output(output_path: str):
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    return tmp_path
+
+
+class BundleExporter:
+    """批量导出合同
+
+    合同以迭代器形式逐份读取、渲染和写出，适合一次导出数百份续租合同：
+    - export_zip: 每份合同一个 Markdown 和/或 PDF 文件，逐个写入 zip
+    - export_pdf: 所有合同合并为一个带书签的 PDF，每份合同从新的一页开始
+
+    所有输出都先写入临时文件，完成后再重命名为目标文件。
+    """
+
+    def __init__(self, output_dir: str = EXPORT_DIR,
+                 name_for: Optional[Callable[[Dict, int], str]] = None,
+                 progress: Optional[Callable[[int], None]] = None):
+        """
+        Args:
+            output_dir: 默认输出目录
+            name_for: 根据 (合同, 序号) 生成文件名或书签标题（不含扩展名）
+            progress: 每处理完一份合同调用一次，参数为已处理数量
+        """
+        self.output_dir = output_dir
+        self.name_for = name_for or _default_name
+        self.progress = progress
+
+    def _output_path(self, output_path: Optional[str], extension: str) -> str:
+        if output_path:
+            return output_path
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(self.output_dir, f"contracts_{timestamp}.{extension}")
+
+    def _report(self, count: int) -> None:
+        if self.progress:
+            self.progress(count)
+
+    def export_zip(self, contracts: Iterable[Dict], output_path: Optional[str] = None,
+                   formats: Sequence[str] = ("md",)) -> str:
+        """
+        导出为 zip，每份合同生成 formats 中指定格式（md、pdf）的文件
+
+        Returns:
+            zip 文件路径
+        """
+        unknown = set(formats) - {"md", "pdf"}
+        if unknown:
+            raise ValueError(f"不支持的导出格式: {', '.join(sorted(unknown))}")
+        output_path = self._output_path(output_path, "zip")
+        tmp_path = _temp_output(output_path)
+        try:
+            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                count = 0
+                for index, contract in enumerate(contracts):
+                    name = self.name_for(contract, index)
+                    if "md" in formats:
+                        archive.writestr(f"{name}.md", convert_contract_to_markdown(contract))
+                    if "pdf" in formats:
+                        with archive.open(f"{name}.pdf", "w") as member:
+                            write_contract_pdf(contract, member)
+                    count += 1
+                    self._report(count)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return output_path
+
+    def export_pdf(self, contracts: Iterable[Dict], output_path: Optional[str] = None) -> str:
+        """
+        导出为一个 PDF，每份合同一个书签
+
+        内容按合同逐份生成；已完成的页面以压缩后的页面流保存在 ReportLab 文档中，
+        直到最后写出文件。
+
+        Returns:
+            PDF 文件路径
+        """
+        output_path = self._output_path(output_path, "pdf")
+        counter = {"count": 0}
+
+        def parts() -> Iterator[List[Flowable]]:
+            for index, contract in enumerate(contracts):
+                if index:
+                    yield [PageBreak()]
+                title = self.name_for(contract, index)
+                yield [_Bookmark(f"contract-{index}", title)] + contract_story(contract)
+                counter["count"] += 1
+                self._report(counter["count"])
+
+        tmp_path = _temp_output(output_path)
+        try:
+            _new_doc(tmp_path).build(_LazyStory(parts()))
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return output_path
+
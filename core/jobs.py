@@ -0,0 +1,273 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_JOB_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "jobs.db"
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+# Queues refresh the heartbeat of their unfinished jobs every HEARTBEAT_INTERVAL
+# seconds; jobs whose heartbeat is older than HEARTBEAT_TIMEOUT are considered orphaned
+HEARTBEAT_INTERVAL = 10.0
+HEARTBEAT_TIMEOUT = 60.0
+
+
+class JobStore:
+    """Persisted job records in SQLite"""
+
+    def __init__(self, db_path: str = DEFAULT_JOB_DB):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._setup_database()
+
+    def _setup_database(self):
+        """Create the jobs table if it doesn't exist"""
+        with self._lock:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    done INTEGER DEFAULT 0,
+                    total INTEGER,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT,
+                    updated_at TEXT,
+                    owner TEXT,
+                    heartbeat REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+            """)
+            # Job databases created before jobs had owners
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+            if 'owner' not in columns:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            if 'heartbeat' not in columns:
+                self.conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+            self.conn.commit()
+
+    def create(self, kind: str, owner: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO jobs (id, kind, status, created_at, updated_at, owner, heartbeat) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, now, now, owner, time.time())
+            )
+            self.conn.commit()
+        return job_id
+
+    def update(self, job_id: str, **fields) -> None:
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result'], ensure_ascii=False)
+        fields['updated_at'] = datetime.now().isoformat()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self.conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+            self.conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['progress'] = job['done'] / job['total'] if job['total'] else (1.0 if job['status'] == SUCCEEDED else 0.0)
+        return job
+
+    def list_recent(self, limit: int = 20) -> List[Dict]:
+        with self._lock:
+            ids = [row['id'] for row in self.conn.execute(
+                "SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            )]
+        return [self.get(job_id) for job_id in ids]
+
+    def heartbeat(self, owner: str) -> None:
+        """Refresh the heartbeat of owner's unfinished jobs"""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN (?, ?)",
+                (time.time(), owner, QUEUED, RUNNING)
+            )
+            self.conn.commit()
+
+    def fail_orphaned(self, message: str, timeout: float = HEARTBEAT_TIMEOUT,
+                      dead_owners: Iterable[str] = ()) -> int:
+        """
+        Mark unfinished jobs whose owner is gone as failed
+
+        A job is orphaned when its heartbeat is older than timeout (or it has
+        none), or its owner is listed in dead_owners. Jobs of live queues in
+        other processes sharing the database are left alone.
+        """
+        dead_owners = list(dead_owners)
+        owner_clause = f" OR owner IN ({', '.join('?' for _ in dead_owners)})" if dead_owners else ""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                "WHERE status IN (?, ?) AND (heartbeat IS NULL OR heartbeat < ?" + owner_clause + ")",
+                (FAILED, message, datetime.now().isoformat(), QUEUED, RUNNING,
+                 time.time() - timeout, *dead_owners)
+            )
+            self.conn.commit()
+        return cursor.rowcount
+
+    def unfinished_owners(self) -> List[str]:
+        with self._lock:
+            return [row['owner'] for row in self.conn.execute(
+                "SELECT DISTINCT owner FROM jobs WHERE status IN (?, ?) AND owner IS NOT NULL",
+                (QUEUED, RUNNING)
+            )]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+class JobQueue:
+    """
+    Local background job queue for exports and PDF rendering
+
+    submit() records the job and hands it to a thread pool, returning the
+    job id immediately. Job functions receive a progress(done, total,
+    message) callback; their return value is stored as the job result.
+
+    Several worker processes may share one job database. Each queue owns the
+    jobs it submits (host, pid and a per-queue boot id) and keeps their
+    heartbeat fresh from a background thread; a queue only fails jobs whose
+    owner has stopped heartbeating or is a dead process on the same host.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_JOB_DB, max_workers: int = 2,
+                 heartbeat_interval: float = HEARTBEAT_INTERVAL,
+                 heartbeat_timeout: float = HEARTBEAT_TIMEOUT):
+        self.store = JobStore(db_path)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self._fail_orphaned()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lexcraft-job")
+        self._stopped = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="lexcraft-job-heartbeat",
+                                                  daemon=True)
+        self._heartbeat_thread.start()
+
+    def _dead_owners(self) -> List[str]:
+        """Owners on this host whose process no longer exists"""
+        host = socket.gethostname()
+        dead = []
+        for owner in self.store.unfinished_owners():
+            owner_host, _, rest = owner.partition(":")
+            pid = rest.partition(":")[0]
+            if owner_host != host or not pid.isdigit() or owner == self.owner:
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                dead.append(owner)
+            except OSError:
+                pass
+        return dead
+
+    def _fail_orphaned(self) -> int:
+        return self.store.fail_orphaned("Interrupted: worker stopped", self.heartbeat_timeout, self._dead_owners())
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stopped.wait(self.heartbeat_interval):
+            try:
+                self.store.heartbeat(self.owner)
+                # Also pick up jobs of workers that died while this one kept running
+                self._fail_orphaned()
+            except sqlite3.Error as e:
+                print(f"Error updating job heartbeat: {str(e)}")
+
+    def submit(self, kind: str, func: Callable, *args, **kwargs) -> str:
+        """Queue func(*args, progress=..., **kwargs) and return the job id"""
+        job_id = self.store.create(kind, self.owner)
+        self.executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def _run(self, job_id: str, func: Callable, args, kwargs) -> None:
+        self.store.update(job_id, status=RUNNING)
+
+        def progress(done: int, total: Optional[int] = None, message: Optional[str] = None):
+            fields = {'done': done}
+            if total is not None:
+                fields['total'] = total
+            if message is not None:
+                fields['message'] = message
+            self.store.update(job_id, **fields)
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=f"{type(e).__name__}: {e}")
+        else:
+            self.store.update(job_id, status=SUCCEEDED, result=result)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, interval: float = 0.2) -> Optional[Dict]:
+        """Block until the job finishes or timeout expires; returns the latest record"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job['status'] in FINISHED_STATES:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(interval)
+
+    def watch(self, job_id: str, interval: float = 0.5) -> Iterator[Dict]:
+        """Yield the job record whenever it changes, until it finishes"""
+        last = None
+        while True:
+            job = self.store.get(job_id)
+            if job is None:
+                return
+            if job['updated_at'] != last:
+                last = job['updated_at']
+                yield job
+            if job['status'] in FINISHED_STATES:
+                return
+            time.sleep(interval)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+        self._stopped.set()
+        self._heartbeat_thread.join()
+        self.store.close()
+
+
+def format_job(job: Optional[Dict]) -> str:
+    """Human-readable one-line job status"""
+    if job is None:
+        return "Job not found"
+    if job['status'] == SUCCEEDED:
+        return f"Job {job['id']} finished: {job['result']}"
+    if job['status'] == FAILED:
+        return f"Job {job['id']} failed: {job['error']}"
+    progress = f" ({job['done']}/{job['total']})" if job['total'] else ""
+    message = f" - {job['message']}" if job['message'] else ""
+    return f"Job {job['id']} {job['status']}{progress}{message}"
@@ -0,0 +1,360 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # 仅 codec='msgpack' 的 SQLite 存储需要，创建存储时检查
+    msgpack = None
+
+# 会话编码名；每行记录自身的编码，读取时按行解码
+CODECS = ('msgpack', 'json')
+
+
+class StaleSessionError(Exception):
+    """会话在读取之后已被其他请求或进程更新"""
+
+
+class SessionState:
+    """单个用户的会话状态
+
+    contract 是界面上生成和修改的合同；current_contract、initial_requirements 和
+    modification_history 是 ContractAssistant 的对话状态。version 用于乐观并发控制，
+    每次成功保存后加一。
+    """
+
+    FIELDS = ('contract', 'current_contract', 'initial_requirements', 'modification_history')
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.contract: Optional[Dict] = None
+        self.current_contract: Optional[Dict] = None
+        self.initial_requirements: Optional[Dict] = None
+        self.modification_history: List[Dict] = []
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.size_bytes = 0
+        self.version = 0
+
+    def reset(self) -> None:
+        self.contract = None
+        self.current_contract = None
+        self.initial_requirements = None
+        self.modification_history = []
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def estimate_size(self) -> int:
+        """按 JSON 序列化后的长度估算会话占用的内存"""
+        return len(json.dumps(self.to_dict(), ensure_ascii=False, default=str).encode('utf-8'))
+
+
+def encode_state(state: SessionState, codec: str = 'msgpack') -> tuple:
+    """按 codec 序列化并压缩会话内容，返回 (数据, 编码名)"""
+    data = state.to_dict()
+    if codec == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("会话编码配置为 msgpack，但未安装 msgpack")
+        return zlib.compress(msgpack.packb(data, default=str, use_bin_type=True)), 'msgpack+zlib'
+    if codec == 'json':
+        return zlib.compress(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')), 'json+zlib'
+    raise ValueError(f"未知的会话编码: {codec}")
+
+
+def decode_state(session_id: str, payload: bytes, encoding: str) -> SessionState:
+    raw = zlib.decompress(payload)
+    if encoding == 'msgpack+zlib':
+        if msgpack is None:
+            raise RuntimeError("会话数据使用 msgpack 编码，但未安装 msgpack")
+        data = msgpack.unpackb(raw, raw=False)
+    elif encoding == 'json+zlib':
+        data = json.loads(raw.decode('utf-8'))
+    else:
+        raise ValueError(f"未知的会话编码: {encoding}")
+    state = SessionState(session_id)
+    for name in SessionState.FIELDS:
+        if name in data:
+            setattr(state, name, data[name])
+    if state.modification_history is None:
+        state.modification_history = []
+    state.size_bytes = len(payload)
+    return state
+
+
+class SessionStore:
+    """会话存储接口"""
+
+    def load(self, session_id: str) -> Optional[SessionState]:
+        """读取会话，不存在或已过期时返回 None"""
+        raise NotImplementedError
+
+    def save(self, state: SessionState) -> None:
+        """保存会话；存储中的版本与 state.version 不一致时抛出 StaleSessionError"""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """进程内会话存储（默认）
+
+    load 返回存储中的对象本身，同一进程内的请求共享状态。淘汰策略：
+    - 空闲超过 idle_ttl 秒的会话
+    - 会话数超过 max_sessions 时淘汰最久未访问的会话（LRU）
+    - 所有会话估算大小之和超过 max_bytes 时按 LRU 淘汰
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.counters = {'created': 0, 'evicted_ttl': 0, 'evicted_lru': 0, 'evicted_memory': 0}
+
+    def load(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            self._evict_expired()
+            state = self._sessions.get(session_id)
+            if state is not None:
+                self._sessions.move_to_end(session_id)
+                state.last_access = time.time()
+            return state
+
+    def save(self, state: SessionState) -> None:
+        with self._lock:
+            stored = self._sessions.get(state.session_id)
+            if stored is None:
+                if state.version:
+                    # 会话已被淘汰，按新会话重新写入
+                    state.version = 0
+                self._sessions[state.session_id] = state
+                self.counters['created'] += 1
+            elif stored is not state and stored.version != state.version:
+                raise StaleSessionError(f"会话 {state.session_id} 已被更新")
+            else:
+                self._total_bytes -= stored.size_bytes
+                self._sessions[state.session_id] = state
+                self._sessions.move_to_end(state.session_id)
+            state.size_bytes = state.estimate_size()
+            state.last_access = time.time()
+            state.version += 1
+            self._total_bytes += state.size_bytes
+            self._enforce_limits(keep=state.session_id)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+            if state is not None:
+                self._total_bytes -= state.size_bytes
+
+    def _pop_oldest(self, counter: str) -> None:
+        _, state = self._sessions.popitem(last=False)
+        self._total_bytes -= state.size_bytes
+        self.counters[counter] += 1
+
+    def _evict_expired(self) -> None:
+        # 最久未访问的会话在最前面，遇到第一个未过期的会话即可停止
+        deadline = time.time() - self.idle_ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_access >= deadline:
+                break
+            self._pop_oldest('evicted_ttl')
+
+    def _enforce_limits(self, keep: Optional[str] = None) -> None:
+        while len(self._sessions) > self.max_sessions and next(iter(self._sessions)) != keep:
+            self._pop_oldest('evicted_lru')
+        while self._total_bytes > self.max_bytes and len(self._sessions) > 1 and next(iter(self._sessions)) != keep:
+            self._pop_oldest('evicted_memory')
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._evict_expired()
+            return {
+                'backend': 'memory',
+                'live_sessions': len(self._sessions),
+                'total_bytes': self._total_bytes,
+                **self.counters,
+                'evicted': self.counters['evicted_ttl'] + self.counters['evicted_lru'] + self.counters['evicted_memory']
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite 会话存储，可由同一台机器上的多个 worker 进程共享
+
+    会话内容按 codec（msgpack 或 json）序列化并经 zlib 压缩后保存，每行记录所用编码。
+    codec 为 msgpack 但未安装时在创建存储时直接报错，不会静默改用 JSON，
+    以免共享同一数据库的各 worker 写出彼此无法读取的记录。
+    保存时以版本号做条件更新，并发写入同一会话时后到者抛出 StaleSessionError。
+    """
+
+    def __init__(self, db_path: str, idle_ttl: float = 3600, codec: str = 'msgpack'):
+        if codec not in CODECS:
+            raise ValueError(f"未知的会话编码: {codec}，可选 {', '.join(CODECS)}")
+        if codec == 'msgpack' and msgpack is None:
+            raise RuntimeError("会话编码配置为 msgpack，但未安装 msgpack（pip install msgpack），"
+                               "或在 SESSION_CONFIG 中设置 'codec': 'json'")
+        self.codec = codec
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.idle_ttl = idle_ttl
+        self._local = threading.local()
+        self.counters = {'created': 0, 'evicted_ttl': 0, 'conflicts': 0}
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                encoding TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access);
+        """)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程使用独立连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path, timeout=30)
+        return conn
+
+    def load(self, session_id: str) -> Optional[SessionState]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT version, encoding, payload, last_access FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        version, encoding, payload, last_access = row
+        if last_access < time.time() - self.idle_ttl:
+            self.evict_expired()
+            return None
+        state = decode_state(session_id, payload, encoding)
+        state.version = version
+        state.last_access = last_access
+        return state
+
+    def save(self, state: SessionState) -> None:
+        payload, encoding = encode_state(state, self.codec)
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            if state.version == 0:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO sessions (id, version, encoding, payload, last_access) "
+                    "VALUES (?, 1, ?, ?, ?)",
+                    (state.session_id, encoding, payload, now)
+                )
+                created = cursor.rowcount == 1
+            else:
+                cursor = conn.execute(
+                    "UPDATE sessions SET version = version + 1, encoding = ?, payload = ?, last_access = ? "
+                    "WHERE id = ? AND version = ?",
+                    (encoding, payload, now, state.session_id, state.version)
+                )
+                created = False
+            if cursor.rowcount != 1:
+                self.counters['conflicts'] += 1
+                raise StaleSessionError(f"会话 {state.session_id} 已被其他 worker 更新")
+        if created:
+            self.counters['created'] += 1
+        state.version += 1
+        state.size_bytes = len(payload)
+        state.last_access = now
+
+    def delete(self, session_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def evict_expired(self) -> int:
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute("DELETE FROM sessions WHERE last_access < ?", (time.time() - self.idle_ttl,))
+        self.counters['evicted_ttl'] += cursor.rowcount
+        return cursor.rowcount
+
+    def stats(self) -> Dict:
+        self.evict_expired()
+        count, total_bytes = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM sessions"
+        ).fetchone()
+        return {
+            'backend': 'sqlite',
+            'encoding': f'{self.codec}+zlib',
+            'live_sessions': count,
+            'total_bytes': total_bytes,
+            **self.counters,
+            'evicted': self.counters['evicted_ttl']
+        }
+
+
+class SessionManager:
+    """按会话 id（Gradio 的 session_hash）管理用户状态
+
+    默认使用进程内存储；传入 SQLiteSessionStore 后，多个 worker 进程可以共享会话，
+    负载均衡无需会话粘滞。
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 3600, max_bytes: int = 256 * 1024 * 1024,
+                 store: Optional[SessionStore] = None):
+        self.store = store or MemorySessionStore(max_sessions, idle_ttl, max_bytes)
+
+    def get(self, session_id: str) -> SessionState:
+        """获取会话状态，不存在时返回新的空状态（首次 save 时写入存储）"""
+        return self.store.load(session_id) or SessionState(session_id)
+
+    def save(self, state: SessionState) -> None:
+        """保存会话状态，可能抛出 StaleSessionError"""
+        self.store.save(state)
+
+    @contextmanager
+    def session(self, session_id: str) -> Iterator[SessionState]:
+        """在一次请求内使用会话状态，正常结束时自动保存"""
+        state = self.get(session_id)
+        yield state
+        self.save(state)
+
+    def discard(self, session_id: str) -> None:
+        self.store.delete(session_id)
+
+    def stats(self) -> Dict:
+        """返回活跃会话数、估算内存和淘汰计数"""
+        return self.store.stats()
+
+
+def create_session_manager(config: Optional[Dict] = None) -> SessionManager:
+    """根据配置创建会话管理器
+
+    config 示例: {'backend': 'sqlite', 'sqlite_path': 'data/sessions.db', 'idle_ttl': 3600, 'codec': 'msgpack'}
+    """
+    config = config or {}
+    idle_ttl = config.get('idle_ttl', 3600)
+    if config.get('backend', 'memory') == 'sqlite':
+        return SessionManager(store=SQLiteSessionStore(
+            config.get('sqlite_path', 'data/sessions.db'),
+            idle_ttl,
+            codec=config.get('codec', 'msgpack')
+        ))
+    return SessionManager(
+        max_sessions=config.get('max_sessions', 1000),
+        idle_ttl=idle_ttl,
+        max_bytes=config.get('max_bytes', 256 * 1024 * 1024)
+    )
@@ -0,0 +1,140 @@
+import json
+import struct
+import sys
+from collections.abc import Mapping
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, Optional, Tuple
+
+# 缓冲区格式：
+#   MAGIC (8 字节) | 索引长度 (uint32, 小端) | 索引 JSON | 数据区
+# 索引为 {"meta": {...}, "sections": {部分名: {键: [偏移, 长度]}}}，偏移相对数据区起点；
+# 每个条目的值在数据区中单独以 JSON 编码，读取时才解码。
+MAGIC = b'LXCAT\x00\x01\x00'
+HEADER = struct.Struct('<I')
+
+CATALOG_SECTIONS = ('templates', 'clauses', 'relationships')
+
+
+def pack_catalog(sections: Dict[str, Dict], meta: Optional[Dict] = None) -> bytes:
+    """将若干 {键: 值} 字典序列化为带索引的紧凑缓冲区"""
+    index = {'meta': meta or {}, 'sections': {}}
+    chunks = []
+    offset = 0
+    for name, entries in sections.items():
+        section_index = index['sections'][name] = {}
+        for key, value in entries.items():
+            data = json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+            section_index[str(key)] = [offset, len(data)]
+            chunks.append(data)
+            offset += len(data)
+    index_data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return b''.join([MAGIC, HEADER.pack(len(index_data)), index_data, *chunks])
+
+
+class LazySection(Mapping):
+    """只读映射，访问某个键时才从共享缓冲区解码对应的值"""
+
+    def __init__(self, buffer: memoryview, base: int, entries: Dict[str, Tuple[int, int]]):
+        self._buffer = buffer
+        self._base = base
+        self._entries = entries
+
+    def __getitem__(self, key):
+        offset, length = self._entries[key]
+        start = self._base + offset
+        return json.loads(bytes(self._buffer[start:start + length]))
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CatalogBuffer:
+    """读取 pack_catalog 生成的缓冲区，不复制数据区"""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer)
+        if bytes(self._view[:len(MAGIC)]) != MAGIC:
+            raise ValueError("不是有效的目录缓冲区")
+        (index_length,) = HEADER.unpack_from(self._view, len(MAGIC))
+        index_start = len(MAGIC) + HEADER.size
+        index = json.loads(bytes(self._view[index_start:index_start + index_length]))
+        base = index_start + index_length
+        self.meta = index.get('meta', {})
+        self._sections = {
+            name: LazySection(self._view, base, {key: tuple(entry) for key, entry in entries.items()})
+            for name, entries in index['sections'].items()
+        }
+
+    def section(self, name: str) -> LazySection:
+        return self._sections[name]
+
+    def sections(self) -> Tuple[str, ...]:
+        return tuple(self._sections)
+
+    def release(self) -> None:
+        """释放对底层缓冲区的引用（关闭共享内存或 mmap 之前调用）"""
+        self._sections = {}
+        self._view.release()
+
+
+def build_catalog_sections(session) -> Dict[str, Dict]:
+    """从数据库读取 ContractAssistant 使用的全部静态资源"""
+    from .assistance import load_available_templates, load_available_clauses, load_clause_relationships
+    return {
+        'templates': load_available_templates(session),
+        'clauses': load_available_clauses(session),
+        'relationships': load_clause_relationships(session),
+    }
+
+
+class SharedCatalog:
+    """放在 multiprocessing.shared_memory 中的只读目录
+
+    父进程调用 create() 构建一次，worker 进程用 attach(name) 连接；
+    各 worker 只保存键索引，条目内容在访问时从共享内存解码，
+    因此 worker 的常驻内存不随目录增长而增长。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.catalog = CatalogBuffer(shm.buf)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(cls, sections: Dict[str, Dict], meta: Optional[Dict] = None,
+               name: Optional[str] = None) -> 'SharedCatalog':
+        data = pack_catalog(sections, meta)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedCatalog':
+        # 不让 resource_tracker 跟踪 worker 连接的共享内存，否则 worker 退出时会将其删除
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        return cls(shm, owner=False)
+
+    def close(self) -> None:
+        """断开共享内存；创建者同时删除它"""
+        self.catalog.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,75 @@
+import copy
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+def prompt_key(*parts) -> str:
+    """根据模型、消息等请求内容计算合并用的键"""
+    data = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """进程内请求合并（single-flight）
+
+    同一个键同时只执行一次：第一个调用者执行 fn，其余并发调用者等待其完成并
+    得到结果的深拷贝（调用方可以各自修改）；fn 抛出的任何异常（包括 KeyboardInterrupt
+    等 BaseException）同样传递给所有等待者。
+    执行结束后键即被移除，之后的调用会重新执行，不做结果缓存。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.counters = {'calls': 0, 'executed': 0, 'coalesced': 0, 'errors': 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """执行或等待 key 对应的调用，返回 (结果, 是否与其他调用共享)"""
+        with self._lock:
+            self.counters['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.counters['coalesced'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.counters['executed'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+
+        try:
+            result = fn()
+            # 保存一份副本供等待者拷贝，避免执行者修改返回值后影响其他调用者
+            call.result = copy.deepcopy(result)
+            return result, call.waiters > 0
+        except BaseException as e:
+            # KeyboardInterrupt、CancelledError 等同样传递给等待者，不能让它们得到 None
+            call.error = e
+            with self._lock:
+                self.counters['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict:
+        """返回调用总数、实际执行数、被合并的调用数和在途请求数"""
+        with self._lock:
+            return {**self.counters, 'in_flight': len(self._calls)}
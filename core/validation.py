@@ -0,0 +1,279 @@
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+import re
+
+
+class FieldError(NamedTuple):
+    """结构化的字段校验错误"""
+    record: int       # 批量校验中的记录序号
+    field: str
+    code: str         # required / type / min / max / pattern / option
+    message: str
+
+
+class FieldRule(NamedTuple):
+    """单个字段的校验规则（编译前）"""
+    name: str
+    type: str = 'text'
+    required: bool = False
+    label: Optional[str] = None
+    min: object = None
+    max: object = None
+    exclusive_min: object = None
+    pattern: Optional[str] = None
+    options: Tuple[str, ...] = ()
+    messages: Mapping = {}
+
+
+# 规则检查函数：返回 (code, message) 或 None
+Check = Callable[[object], Optional[Tuple[str, str]]]
+
+_MISSING = object()
+
+
+def _to_number(value) -> float:
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return float(value)
+
+
+def _to_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), '%Y-%m-%d').date()
+
+
+def _resolve_date_bound(bound) -> Callable[[], date]:
+    """日期边界支持固定日期或 'today'，后者在校验时求值"""
+    if isinstance(bound, str) and bound.lower() == 'today':
+        return date.today
+    fixed = _to_date(bound)
+    return lambda: fixed
+
+
+def _coerce_bound(rule: FieldRule, attr: str, convert: Callable):
+    """按字段类型转换边界值；与字段类型不兼容时打印警告并返回 None（跳过该规则）"""
+    value = getattr(rule, attr)
+    if value is None:
+        return None
+    try:
+        return convert(value)
+    except (TypeError, ValueError, OverflowError):
+        print(f"Warning: Invalid {attr} bound for {rule.type} field {rule.name}: {value!r}")
+        return None
+
+
+def _compile_checks(rule: FieldRule) -> List[Check]:
+    """将一条规则编译为检查函数列表，正则、边界和选项集合只在此处解析一次"""
+    label = rule.label or rule.name
+    messages = rule.messages or {}
+
+    def message(code: str, default: str) -> str:
+        return messages.get(code, default)
+
+    checks: List[Check] = []
+    field_type = rule.type
+
+    if field_type == 'number':
+        type_error = ('type', message('type', f'Invalid {label} format'))
+
+        def check_number(value, _err=type_error):
+            try:
+                _to_number(value)
+            except (TypeError, ValueError):
+                return _err
+            return None
+        checks.append(check_number)
+
+        bound = _coerce_bound(rule, 'exclusive_min', _to_number)
+        if bound is not None:
+            err = ('min', message('min', f'{label} must be greater than {rule.exclusive_min}'))
+            checks.append(lambda v, b=bound, e=err: e if _to_number(v) <= b else None)
+        bound = _coerce_bound(rule, 'min', _to_number)
+        if bound is not None:
+            err = ('min', message('min', f'{label} must be at least {rule.min}'))
+            checks.append(lambda v, b=bound, e=err: e if _to_number(v) < b else None)
+        bound = _coerce_bound(rule, 'max', _to_number)
+        if bound is not None:
+            err = ('max', message('max', f'{label} must be at most {rule.max}'))
+            checks.append(lambda v, b=bound, e=err: e if _to_number(v) > b else None)
+
+    elif field_type == 'date':
+        type_error = ('type', message('type', f'Invalid {label} format'))
+
+        def check_date(value, _err=type_error):
+            try:
+                _to_date(value)
+            except (TypeError, ValueError):
+                return _err
+            return None
+        checks.append(check_date)
+
+        bound = _coerce_bound(rule, 'min', _resolve_date_bound)
+        if bound is not None:
+            err = ('min', message('min', f'{label} cannot be earlier than {rule.min}'))
+            checks.append(lambda v, b=bound, e=err: e if _to_date(v) < b() else None)
+        bound = _coerce_bound(rule, 'max', _resolve_date_bound)
+        if bound is not None:
+            err = ('max', message('max', f'{label} cannot be later than {rule.max}'))
+            checks.append(lambda v, b=bound, e=err: e if _to_date(v) > b() else None)
+
+    elif field_type in ('select', 'multiselect', 'checkbox') and rule.options:
+        allowed = frozenset(rule.options)
+        err = ('option', message('option', f'Invalid option for {label}'))
+        if field_type == 'multiselect':
+            def check_options(value, _allowed=allowed, _err=err):
+                values = value if isinstance(value, (list, tuple, set)) else [value]
+                return _err if any(str(v) not in _allowed for v in values) else None
+        elif field_type == 'checkbox':
+            def check_options(value, _allowed=allowed, _err=err):
+                if isinstance(value, bool):
+                    return None
+                return _err if str(value) not in _allowed else None
+        else:
+            def check_options(value, _allowed=allowed, _err=err):
+                return _err if str(value) not in _allowed else None
+        checks.append(check_options)
+
+    else:
+        # text：min/max 表示长度
+        bound = _coerce_bound(rule, 'min', int)
+        if bound is not None:
+            err = ('min', message('min', f'{label} must be at least {bound} characters'))
+            checks.append(lambda v, b=bound, e=err: e if len(str(v)) < b else None)
+        bound = _coerce_bound(rule, 'max', int)
+        if bound is not None:
+            err = ('max', message('max', f'{label} must be at most {bound} characters'))
+            checks.append(lambda v, b=bound, e=err: e if len(str(v)) > b else None)
+
+    if rule.pattern:
+        try:
+            regex = re.compile(rule.pattern)
+        except re.error:
+            print(f"Warning: Invalid validation pattern for {rule.name}: {rule.pattern}")
+        else:
+            err = ('pattern', message('pattern', f'{label} has an invalid format'))
+            checks.append(lambda v, r=regex, e=err: e if not r.search(str(v)) else None)
+
+    return checks
+
+
+class CompiledValidator:
+    """预编译的字段校验器
+
+    规则在构造时编译为闭包，之后可以对单条或批量记录重复执行，
+    不再遍历 JSON Schema 或重复解析正则与边界值。
+    """
+
+    def __init__(self, rules: Iterable[FieldRule]):
+        self.rules = tuple(rules)
+        self._compiled = []
+        for rule in self.rules:
+            required_error = None
+            if rule.required:
+                label = rule.label or rule.name
+                required_error = (rule.messages or {}).get('required', f'{label} cannot be empty')
+            self._compiled.append((rule.name, required_error, tuple(_compile_checks(rule))))
+
+    def validate(self, record: Dict, index: int = 0) -> List[FieldError]:
+        """校验单条记录"""
+        errors = []
+        for name, required_error, checks in self._compiled:
+            value = record.get(name, _MISSING)
+            if value is _MISSING or value is None or value == '' or value == []:
+                if required_error:
+                    errors.append(FieldError(index, name, 'required', required_error))
+                continue
+            for check in checks:
+                result = check(value)
+                if result:
+                    errors.append(FieldError(index, name, result[0], result[1]))
+                    # 类型错误时后续的边界检查没有意义
+                    if result[0] == 'type':
+                        break
+        return errors
+
+    def validate_batch(self, records: Iterable[Dict]) -> List[FieldError]:
+        """批量校验，返回所有记录的错误，FieldError.record 为记录序号"""
+        errors = []
+        validate = self.validate
+        for index, record in enumerate(records):
+            errors.extend(validate(record, index))
+        return errors
+
+    @classmethod
+    def from_template_graph(cls, graph) -> 'CompiledValidator':
+        """由 TemplateGraph 的字段定义、validation_rules 和 FieldOption 构造"""
+        rules = []
+        for field in graph.fields:
+            validation = field.validation_rules or {}
+            rules.append(FieldRule(
+                name=field.name,
+                type=field.type,
+                required=field.required,
+                label=field.description or field.name,
+                min=validation.get('min'),
+                max=validation.get('max'),
+                exclusive_min=validation.get('exclusive_min'),
+                pattern=validation.get('pattern'),
+                options=tuple(opt.value for opt in field.options) or tuple(validation.get('options', ())),
+                messages=validation.get('messages', {})
+            ))
+        return cls(rules)
+
+    @classmethod
+    def from_structure(cls, structure: Dict) -> 'CompiledValidator':
+        """由 ContractParser 输出的 sections/fields 结构构造"""
+        rules = []
+        for section in structure.get('sections', []):
+            for field in section.get('fields', []):
+                validation = field.get('validation') or {}
+                rules.append(FieldRule(
+                    name=field['name'],
+                    type=field.get('type', 'text'),
+                    required=bool(field.get('required')),
+                    label=field.get('label'),
+                    min=validation.get('min'),
+                    max=validation.get('max'),
+                    pattern=validation.get('pattern'),
+                    options=tuple(field.get('options') or ())
+                ))
+        return cls(rules)
+
+
+# 租赁合同基础字段的默认校验规则
+LEASE_FIELD_RULES = (
+    FieldRule('start_date', type='date', required=True, min='today', messages={
+        'type': 'Invalid start date format',
+        'min': 'Start date cannot be earlier than today',
+        'required': 'Start date cannot be empty'
+    }),
+    FieldRule('rent_amount', type='number', required=True, exclusive_min=0, messages={
+        'type': 'Invalid rent amount format',
+        'min': 'Rent amount must be greater than 0',
+        'required': 'Rent amount cannot be empty'
+    }),
+    FieldRule('deposit_amount', type='number', exclusive_min=0, messages={
+        'type': 'Invalid deposit amount format',
+        'min': 'Deposit amount must be greater than 0'
+    }),
+    FieldRule('city', required=True, label='City'),
+    FieldRule('province', required=True, label='Province'),
+    FieldRule('duration_amount', required=True, label='Duration'),
+)
+
+LEASE_VALIDATOR = CompiledValidator(LEASE_FIELD_RULES)
+
+_template_validators: Dict[Tuple[int, str], CompiledValidator] = {}
+
+
+def get_template_validator(graph) -> CompiledValidator:
+    """按 (template_id, version) 缓存模板校验器"""
+    key = (graph.template_id, graph.version)
+    validator = _template_validators.get(key)
+    if validator is None:
+        validator = CompiledValidator.from_template_graph(graph)
+        _template_validators[key] = validator
+    return validator
@@ -8,4 +8,6 @@ from .orm import (
     LegalExplanation,
     get_db_session,
     Base
-)
\ No newline at end of file
+)
+from .repository import ClauseRepository, TemplateRepository
+from .template_loader import TemplateGraph, TemplateGraphLoader
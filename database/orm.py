@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Date, ForeignKey, Text, JSON
+from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Date, ForeignKey, Text, JSON, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
@@ -19,9 +19,14 @@ class ContractTemplate(Base):
     features = Column(JSON)  # 特殊功能
     property_types = Column(JSON)  # 适用的物业类型
     province = Column(String(50))  # 适用的省份
+    content_hash = Column(String(64))  # 来源 PDF 的 SHA-256，用于导入去重
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        UniqueConstraint('province', 'type', 'content_hash', name='uq_contract_templates_source'),
+    )
+
     def __repr__(self):
         return f"<ContractTemplate(id={self.id}, type='{self.type}', version='{self.version}')>"
 
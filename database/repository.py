@@ -0,0 +1,220 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import Text, cast, event, lambda_stmt, or_, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import default
+from sqlalchemy.orm import Session
+
+from .orm import ContractTemplate, SpecialClause, ClauseTranslation
+
+
+class ClauseRepository:
+    """特殊条款的热点查询
+
+    使用 SQLAlchemy 的 lambda 语句缓存：语句结构只在第一次调用时构建和编译，
+    之后的调用只替换绑定参数，跳过 Python 侧的表达式构建与 SQL 编译。
+    """
+
+    # 用于在 after_cursor_execute 事件中识别本仓库发出的语句；
+    # 值为各实例自己的标记，同一引擎上的多个仓库互不计入对方的统计
+    EXECUTION_OPTION = 'lexcraft_clause_repository'
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.stats = {'executions': 0, 'cache_hits': 0, 'cache_misses': 0}
+        self._tag = id(self)
+        self._engine = session.get_bind()
+        event.listen(self._engine, 'after_cursor_execute', self._record_cache_usage)
+
+    def close(self) -> None:
+        """移除引擎上的事件监听"""
+        if event.contains(self._engine, 'after_cursor_execute', self._record_cache_usage):
+            event.remove(self._engine, 'after_cursor_execute', self._record_cache_usage)
+
+    def _record_cache_usage(self, conn, cursor, statement, parameters, context, executemany):
+        """统计语句编译缓存的命中情况"""
+        if context.execution_options.get(self.EXECUTION_OPTION) != self._tag:
+            return
+        self.stats['executions'] += 1
+        if context.cache_hit is default.CACHE_HIT:
+            self.stats['cache_hits'] += 1
+        else:
+            self.stats['cache_misses'] += 1
+
+    def _execute(self, stmt):
+        return self.session.execute(stmt, execution_options={self.EXECUTION_OPTION: self._tag})
+
+    def get_by_type(self, clause_type: str) -> Optional[SpecialClause]:
+        """按 clause_type 获取条款模板"""
+        stmt = lambda_stmt(lambda: select(SpecialClause))
+        stmt += lambda s: s.where(SpecialClause.clause_type == clause_type)
+        stmt += lambda s: s.limit(1)
+        return self._execute(stmt).scalars().first()
+
+    def list_by_category(self, category: str) -> List[SpecialClause]:
+        """按类别获取所有条款"""
+        stmt = lambda_stmt(lambda: select(SpecialClause))
+        stmt += lambda s: s.where(SpecialClause.category == category)
+        return list(self._execute(stmt).scalars().all())
+
+    def list_by_category_and_province(self, category: str, province: str) -> List[SpecialClause]:
+        """按类别和省份获取所有条款"""
+        stmt = lambda_stmt(lambda: select(SpecialClause))
+        stmt += lambda s: s.where(
+            SpecialClause.category == category,
+            SpecialClause.province == province
+        )
+        return list(self._execute(stmt).scalars().all())
+
+    def list_all(self) -> List[SpecialClause]:
+        """获取全部条款"""
+        stmt = lambda_stmt(lambda: select(SpecialClause).order_by(SpecialClause.id))
+        return list(self._execute(stmt).scalars().all())
+
+    def list_translations(self, language: str) -> List[ClauseTranslation]:
+        """一次性获取某个语言的全部条款翻译"""
+        stmt = lambda_stmt(lambda: select(ClauseTranslation))
+        stmt += lambda s: s.where(ClauseTranslation.language == language)
+        return list(self._execute(stmt).scalars().all())
+
+    def cache_stats(self) -> Dict:
+        """返回语句缓存统计，包括命中率"""
+        executions = self.stats['executions']
+        return {
+            **self.stats,
+            'hit_ratio': self.stats['cache_hits'] / executions if executions else 0.0
+        }
+
+
+class TemplateRepository:
+    """合同模板的版本查询与导入写入
+
+    模板以 (province, type, content_hash) 唯一标识，content_hash 是来源 PDF 的
+    SHA-256。重复导入同一文件只会更新已有行，内容未变化时不做任何写入。
+    同一 (type, province) 可以有多个修订版本，最后导入的一条为当前版本。
+    """
+
+    # 当前版本排在最前：按导入时间倒序，时间相同或缺失时按 id 倒序
+    LATEST_FIRST = (ContractTemplate.created_at.desc().nulls_last(), ContractTemplate.id.desc())
+
+    CONFLICT_COLUMNS = ('province', 'type', 'content_hash')
+    UPDATE_COLUMNS = ('version', 'description', 'sections', 'features', 'property_types')
+    JSON_COLUMNS = ('sections', 'features', 'property_types')
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_latest(self, template_type: str, province: str) -> Optional[ContractTemplate]:
+        """获取某类型、省份模板的当前版本"""
+        return self.session.execute(
+            select(ContractTemplate)
+            .where(ContractTemplate.type == template_type, ContractTemplate.province == province)
+            .order_by(*self.LATEST_FIRST)
+            .limit(1)
+        ).scalars().first()
+
+    def find_by_source(self, template_type: str, province: str, content_hash: str) -> Optional[ContractTemplate]:
+        """获取由同一来源文件导入的模板"""
+        return self.session.execute(
+            select(ContractTemplate).where(
+                ContractTemplate.type == template_type,
+                ContractTemplate.province == province,
+                ContractTemplate.content_hash == content_hash
+            )
+        ).scalars().first()
+
+    def _insert(self):
+        """支持 ON CONFLICT 的方言返回对应的 insert 构造，否则返回 None"""
+        dialect = self.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            return postgresql.insert(ContractTemplate)
+        if dialect == 'sqlite':
+            return sqlite.insert(ContractTemplate)
+        return None
+
+    @classmethod
+    def _key(cls, row: Dict) -> tuple:
+        return tuple(row.get(column) for column in cls.CONFLICT_COLUMNS)
+
+    def _changed(self, excluded):
+        """已有行与新值是否有差异（JSON 列按文本比较）"""
+        conditions = []
+        for column in self.UPDATE_COLUMNS:
+            current, new = getattr(ContractTemplate, column), excluded[column]
+            if column in self.JSON_COLUMNS:
+                current, new = cast(current, Text), cast(new, Text)
+            conditions.append(current.is_distinct_from(new))
+        return or_(*conditions)
+
+    def upsert_many(self, rows: List[Dict]) -> List[int]:
+        """插入或更新一批模板，返回与 rows 一一对应的模板 id
+
+        不提交事务，由调用方决定提交时机。
+
+        Args:
+            rows: 模板字段字典，必须包含 province、type 和 content_hash
+        """
+        if not rows:
+            return []
+        for row in rows:
+            if not row.get('content_hash'):
+                raise ValueError("导入的模板必须包含 content_hash")
+
+        # 同一批次内的重复文件只保留最后一条，避免一条语句两次更新同一行
+        unique = {self._key(row): row for row in rows}
+        insert = self._insert()
+        if insert is None:
+            ids = self._upsert_each(unique)
+            return [ids[self._key(row)] for row in rows]
+
+        columns = sorted({column for row in unique.values() for column in row})
+        values = [{column: row.get(column) for column in columns} for row in unique.values()]
+
+        stmt = insert.values(values)
+        set_ = {column: stmt.excluded[column] for column in self.UPDATE_COLUMNS if column in columns}
+        set_['updated_at'] = datetime.utcnow()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(self.CONFLICT_COLUMNS),
+            set_=set_,
+            where=self._changed(stmt.excluded)
+        ).returning(ContractTemplate.id, *(getattr(ContractTemplate, c) for c in self.CONFLICT_COLUMNS))
+
+        ids = {tuple(row[1:]): row[0] for row in self.session.execute(stmt)}
+
+        # 内容未变化的行不会被更新，也不会出现在 RETURNING 中
+        missing = [key for key in unique if key not in ids]
+        if missing:
+            key_columns = tuple_(*(getattr(ContractTemplate, c) for c in self.CONFLICT_COLUMNS))
+            existing = self.session.execute(
+                select(ContractTemplate.id, *(getattr(ContractTemplate, c) for c in self.CONFLICT_COLUMNS))
+                .where(key_columns.in_(missing))
+            )
+            ids.update({tuple(row[1:]): row[0] for row in existing})
+
+        return [ids[self._key(row)] for row in rows]
+
+    def _upsert_each(self, unique: Dict[tuple, Dict]) -> Dict[tuple, int]:
+        """不支持 ON CONFLICT 的数据库：逐行先查询再插入或更新"""
+        ids = {}
+        for key, row in unique.items():
+            template = self.session.execute(
+                select(ContractTemplate).filter_by(**dict(zip(self.CONFLICT_COLUMNS, key)))
+            ).scalars().first()
+            if template is None:
+                template = ContractTemplate(**row)
+                self.session.add(template)
+            else:
+                changed = False
+                for column in self.UPDATE_COLUMNS:
+                    if column in row and getattr(template, column) != row[column]:
+                        setattr(template, column, row[column])
+                        changed = True
+                if changed:
+                    template.updated_at = datetime.utcnow()
+            self.session.flush()
+            ids[key] = template.id
+        return ids
+
+    def upsert(self, row: Dict) -> int:
+        """插入或更新单个模板，返回模板 id"""
+        return self.upsert_many([row])[0]
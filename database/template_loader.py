@@ -0,0 +1,157 @@
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+import json
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from .orm import ContractTemplate, TemplateField
+
+
+def _freeze(value):
+    """递归地将 dict/list 转为只读的 MappingProxyType/tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _load_json(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    return value
+
+
+class FieldOptionSpec(NamedTuple):
+    value: str
+    label: str
+    is_default: bool
+
+
+class ExplanationSpec(NamedTuple):
+    province: str
+    explanation: str
+    legal_reference: Optional[str]
+
+
+class FieldSpec(NamedTuple):
+    id: int
+    name: str
+    type: str
+    section: str
+    required: bool
+    validation_rules: Mapping
+    default_value: Optional[str]
+    description: Optional[str]
+    options: Tuple[FieldOptionSpec, ...]
+    explanations: Mapping  # province -> ExplanationSpec
+
+
+class TemplateGraph(NamedTuple):
+    """模板字段图的只读快照"""
+    template_id: int
+    version: str
+    type: str
+    province: Optional[str]
+    fields: Tuple[FieldSpec, ...]
+    fields_by_name: Mapping  # field_name -> FieldSpec
+    explanations: Mapping  # (field_name, province) -> ExplanationSpec
+
+    def field(self, field_name: str) -> Optional[FieldSpec]:
+        return self.fields_by_name.get(field_name)
+
+    def explanation(self, field_name: str, province: str) -> Optional[ExplanationSpec]:
+        """按字段名和省份获取法律解释"""
+        return self.explanations.get((field_name, province))
+
+
+class TemplateGraphLoader:
+    """预加载模板的 TemplateField / FieldOption / LegalExplanation 关系图
+
+    首次加载固定执行 5 条查询（版本、模板、字段、选项、解释），
+    结果按 (template_id, version) 缓存为只读结构；缓存命中时只执行版本查询。
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._cache: Dict[Tuple[int, str], TemplateGraph] = {}
+
+    def load(self, template_id: int) -> Optional[TemplateGraph]:
+        """获取模板字段图，版本未变化时直接返回缓存"""
+        version = self.session.execute(
+            select(ContractTemplate.version).where(ContractTemplate.id == template_id)
+        ).scalar_one_or_none()
+        if version is None:
+            return None
+
+        cached = self._cache.get((template_id, version))
+        if cached is not None:
+            return cached
+
+        template = self.session.execute(
+            select(ContractTemplate)
+            .where(ContractTemplate.id == template_id)
+            .options(
+                selectinload(ContractTemplate.fields).selectinload(TemplateField.options),
+                selectinload(ContractTemplate.fields).selectinload(TemplateField.explanations)
+            )
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
+        if template is None:
+            return None
+
+        graph = self._build_graph(template)
+        # 同一模板只保留最新版本
+        for key in [k for k in self._cache if k[0] == template_id]:
+            del self._cache[key]
+        self._cache[(graph.template_id, graph.version)] = graph
+        return graph
+
+    def invalidate(self, template_id: Optional[int] = None) -> None:
+        """清除缓存，不指定模板时清除全部"""
+        if template_id is None:
+            self._cache.clear()
+            return
+        for key in [k for k in self._cache if k[0] == template_id]:
+            del self._cache[key]
+
+    @staticmethod
+    def _build_graph(template: ContractTemplate) -> TemplateGraph:
+        fields = []
+        explanations = {}
+        for field in template.fields:
+            field_explanations = {}
+            for item in field.explanations:
+                spec = ExplanationSpec(item.province, item.explanation, item.legal_reference)
+                field_explanations[item.province] = spec
+                explanations[(field.field_name, item.province)] = spec
+
+            fields.append(FieldSpec(
+                id=field.id,
+                name=field.field_name,
+                type=field.field_type,
+                section=field.section,
+                required=bool(field.is_required),
+                validation_rules=_freeze(_load_json(field.validation_rules) or {}),
+                default_value=field.default_value,
+                description=field.description,
+                options=tuple(
+                    FieldOptionSpec(opt.option_value, opt.option_label, bool(opt.is_default))
+                    for opt in field.options
+                ),
+                explanations=MappingProxyType(field_explanations)
+            ))
+
+        return TemplateGraph(
+            template_id=template.id,
+            version=template.version,
+            type=template.type,
+            province=template.province,
+            fields=tuple(fields),
+            fields_by_name=MappingProxyType({f.name: f for f in fields}),
+            explanations=MappingProxyType(explanations)
+        )
@@ -1,9 +1,10 @@
 # in main.py
 
-from core.assistance import ContractAssistant
-from core.ContractGenerator import ContractGenerator
-from typing import Dict, List
+# 重量级依赖（openai、SQLAlchemy、reportlab、pdfplumber、gradio）只在对应子命令中导入
+from typing import Dict, Iterator, List
+import argparse
 import json
+import sys
 
 def display_contract(contract: Dict):
     """显示合同内容"""
@@ -34,8 +35,11 @@ def display_contract(contract: Dict):
             print(f"\n{clause.get('title', '未命名条款')}:")
             print(f"{clause.get('content', '条款内容未指定')}")
 
-def main():
-    """主函数，处理用户交互"""
+def run_interactive():
+    """交互式生成和修改合同"""
+    from core.assistance import ContractAssistant
+    from core.ContractGenerator import ContractGenerator
+    
     assistant = ContractAssistant()
     generator = ContractGenerator()
     
@@ -93,5 +97,243 @@ def main():
             print("\n已应用您的修改:")
             display_contract(contract)
 
+def _save_or_print(data: Dict, output: str = None):
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"已保存到 {output}")
+    else:
+        print(text)
+
+def _read_contracts(paths: List[str]) -> Iterator[Dict]:
+    """逐个读取 JSON（对象或数组）或 JSONL 文件中的合同"""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+                continue
+            data = json.load(f)
+        if isinstance(data, list):
+            yield from data
+        else:
+            yield data
+
+def cmd_generate(args):
+    """根据需求生成合同"""
+    if not args.requirements:
+        run_interactive()
+        return
+    
+    from core.assistance import ContractAssistant
+    from core.ContractGenerator import ContractGenerator
+    
+    requirements = ContractAssistant().interact_with_ai(args.requirements, interaction_type="initial")
+    contract = ContractGenerator().generate_contract(
+        requirements['template_type'],
+        requirements['basic_info'],
+        [clause['clause_type'] for clause in requirements.get('suggested_clauses', [])]
+    )
+    if not contract:
+        print("合同生成失败")
+        sys.exit(1)
+    _save_or_print(contract, args.output)
+
+def cmd_modify(args):
+    """按描述修改已保存的合同"""
+    from core.assistance import ContractAssistant
+    from core.ContractGenerator import ContractGenerator
+    from core.session import SessionState
+    import copy
+    
+    with open(args.contract, "r", encoding="utf-8") as f:
+        contract = json.load(f)
+    # 将已保存的合同作为会话上下文提供给AI，修改建议才能针对该合同；
+    # 助手会就地更新 current_contract，传入副本，修改只由生成器应用一次
+    state = SessionState(args.contract)
+    state.contract = contract
+    state.current_contract = copy.deepcopy(contract)
+    modifications = ContractAssistant().interact_with_ai(args.modifications, state=state)
+    contract = ContractGenerator().modify_contract(contract, modifications.get('modifications', []))
+    _save_or_print(contract, args.output or args.contract)
+
+def cmd_import(args):
+    """导入合同模板 PDF（单个文件或目录）"""
+    import os
+    from config import DEEPSEEK_CONFIG
+    
+    if os.path.isdir(args.path):
+        from tools.import_templates import BatchTemplateImporter
+        BatchTemplateImporter(
+            args.path,
+            DEEPSEEK_CONFIG,
+            province=args.province,
+            workers=args.workers,
+            concurrency=args.concurrency
+        ).run()
+        return
+    
+    if not args.province:
+        print("导入单个文件时必须指定 --province")
+        sys.exit(2)
+    from pdf_processor.parser import import_contract_template
+    template = import_contract_template(
+        args.path,
+        args.province,
+        DEEPSEEK_CONFIG['api_key'],
+        DEEPSEEK_CONFIG['base_url'],
+        DEEPSEEK_CONFIG['model']
+    )
+    if template is None:
+        sys.exit(1)
+
+def cmd_export(args):
+    """导出合同文件为 Markdown、PDF、zip 或合并 PDF"""
+    from core.exporter import BundleExporter, export_contract_files
+    
+    contracts = _read_contracts(args.contracts)
+    if args.format == "zip":
+        path = BundleExporter().export_zip(contracts, args.output, formats=tuple(args.zip_formats))
+        print(f"已导出到 {path}")
+    elif args.format == "bundle-pdf":
+        path = BundleExporter().export_pdf(contracts, args.output)
+        print(f"已导出到 {path}")
+    else:
+        for contract in contracts:
+            for path in export_contract_files(contract, formats=(args.format,)):
+                print(f"已导出到 {path}")
+
+def cmd_batch(args):
+    """从 CSV/JSONL 批量生成合同"""
+    import os
+    from core.batch import BatchGenerator
+    
+    snapshot = None
+    snapshot_path = args.snapshot or os.environ.get("LEXCRAFT_CATALOG_SNAPSHOT")
+    if snapshot_path:
+        from core.catalog_snapshot import SnapshotFile
+        snapshot = SnapshotFile(snapshot_path)
+        if not snapshot.verify():
+            print(f"Warning: catalog snapshot {snapshot_path} is older than the database")
+    try:
+        stats = BatchGenerator(
+            args.input,
+            args.output,
+            markdown_dir=args.markdown_dir,
+            concurrency=args.concurrency,
+            catalog=snapshot.catalog if snapshot else None,
+            resume=not args.restart
+        ).run()
+    finally:
+        if snapshot:
+            snapshot.close()
+    if stats['failed']:
+        sys.exit(1)
+
+def cmd_serve(args):
+    """启动 Web 界面"""
+    if args.workers > 1:
+        from tools.run_workers import run_workers
+        run_workers(args.workers, args.port)
+        return
+    
+    import app
+    app.demo.queue().launch(server_port=args.port)
+
+def cmd_diagnose(args):
+    """检查运行环境并输出导入耗时报告"""
+    import importlib.util
+    import os
+    from utils.import_profile import import_time_report
+    
+    print(f"Python {sys.version.split()[0]}")
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.py")
+    print(f"config.py: {'found' if os.path.exists(config_path) else 'missing (copy config-example.py)'}")
+    
+    print("\n依赖:")
+    for package in ("openai", "sqlalchemy", "psycopg2", "reportlab", "pdfplumber",
+                    "jsonschema", "gradio", "dateutil", "msgpack"):
+        available = importlib.util.find_spec(package) is not None
+        print(f"    {package:<12} {'ok' if available else 'not installed'}")
+    
+    if args.check_db:
+        from sqlalchemy import text
+        from database.orm import get_db_session
+        try:
+            session, _ = get_db_session()
+            session.execute(text("SELECT 1"))
+            session.close()
+            print("\n数据库: ok")
+        except Exception as e:
+            print(f"\n数据库: failed ({e})")
+    
+    print("\n导入耗时 (-X importtime):")
+    within_budget = import_time_report(args.modules or None, top=args.top, budget_ms=args.budget_ms)
+    if not within_budget:
+        sys.exit(1)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="LexCraft 智能合同系统")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    generate = subparsers.add_parser("generate", help="生成合同（默认交互模式）")
+    generate.add_argument("--requirements", help="需求描述；提供时以非交互方式生成一份合同")
+    generate.add_argument("--output", help="保存合同 JSON 的路径")
+    generate.set_defaults(func=cmd_generate)
+    
+    modify = subparsers.add_parser("modify", help="修改已保存的合同")
+    modify.add_argument("contract", help="合同 JSON 文件")
+    modify.add_argument("modifications", help="修改描述")
+    modify.add_argument("--output", help="保存路径（默认覆盖原文件）")
+    modify.set_defaults(func=cmd_modify)
+    
+    import_ = subparsers.add_parser("import", help="导入合同模板 PDF")
+    import_.add_argument("path", help="PDF 文件或目录")
+    import_.add_argument("--province", help="省份代码（目录导入时默认根据文件名推断）")
+    import_.add_argument("--workers", type=int, default=None, help="文本提取进程数")
+    import_.add_argument("--concurrency", type=int, default=4, help="LLM 并发请求上限")
+    import_.set_defaults(func=cmd_import)
+    
+    export = subparsers.add_parser("export", help="导出合同")
+    export.add_argument("contracts", nargs="+", help="合同 JSON/JSONL 文件")
+    export.add_argument("--format", choices=["md", "pdf", "zip", "bundle-pdf"], default="md")
+    export.add_argument("--zip-formats", nargs="+", choices=["md", "pdf"], default=["md"],
+                        help="zip 中每份合同包含的格式")
+    export.add_argument("--output", help="zip 或合并 PDF 的输出路径")
+    export.set_defaults(func=cmd_export)
+    
+    batch = subparsers.add_parser("batch", help="从 CSV/JSONL 批量生成合同")
+    batch.add_argument("input", help="需求记录文件（.csv 或 .jsonl）")
+    batch.add_argument("--output", default="exports/batch_contracts.jsonl", help="结果 JSONL 文件")
+    batch.add_argument("--markdown-dir", help="为每份合同写出 Markdown 文件的目录")
+    batch.add_argument("--concurrency", type=int, default=4, help="LLM 并发请求上限")
+    batch.add_argument("--snapshot", help="目录快照文件（默认读取 LEXCRAFT_CATALOG_SNAPSHOT）")
+    batch.add_argument("--restart", action="store_true", help="忽略已有结果，重新生成全部记录")
+    batch.set_defaults(func=cmd_batch)
+    
+    serve = subparsers.add_parser("serve", help="启动 Web 界面")
+    serve.add_argument("--port", type=int, default=7860)
+    serve.add_argument("--workers", type=int, default=1, help="worker 进程数（大于 1 时共享目录）")
+    serve.set_defaults(func=cmd_serve)
+    
+    diagnose = subparsers.add_parser("diagnose", help="检查环境和导入耗时")
+    diagnose.add_argument("--modules", nargs="*", help="需要测量导入耗时的模块")
+    diagnose.add_argument("--top", type=int, default=8, help="每个模块显示的最耗时的包数量")
+    diagnose.add_argument("--budget-ms", type=float, help="单个模块导入耗时上限，超出时返回非零退出码")
+    diagnose.add_argument("--check-db", action="store_true", help="同时检查数据库连接")
+    diagnose.set_defaults(func=cmd_diagnose)
+    
+    return parser
+
+def main(argv: List[str] = None):
+    """主函数，解析子命令；不带子命令时进入交互模式"""
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        run_interactive()
+        return
+    args.func(args)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
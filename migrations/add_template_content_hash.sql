@@ -0,0 +1,28 @@
+-- 为合同模板添加来源 PDF 的内容哈希，用于导入去重
+
+-- 删除完全重复的模板（保留 id 最小的一条）
+DELETE FROM contract_templates a
+USING contract_templates b
+WHERE a.id > b.id
+  AND a.province IS NOT DISTINCT FROM b.province
+  AND a.type = b.type
+  AND a.version = b.version
+  AND a.description IS NOT DISTINCT FROM b.description
+  AND a.sections::text IS NOT DISTINCT FROM b.sections::text
+  AND NOT EXISTS (SELECT 1 FROM template_fields f WHERE f.template_id = a.id)
+  AND NOT EXISTS (SELECT 1 FROM contract_structures s WHERE s.template_id = a.id);
+
+-- 添加内容哈希列
+ALTER TABLE contract_templates
+    ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+-- 同一省份、类型和来源文件只允许一条模板
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'uq_contract_templates_source'
+    ) THEN
+        ALTER TABLE contract_templates
+            ADD CONSTRAINT uq_contract_templates_source UNIQUE (province, type, content_hash);
+    END IF;
+END $$;
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+# Bump when extraction or post-processing changes in a way that affects cached output
+PARSER_VERSION = "1"
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache", "parser"
+)
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest of a text's UTF-8 encoding"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def write_json_atomic(path: str, data) -> None:
+    """Write JSON to path via a temp file and rename so readers never see partial files"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ParseCache:
+    """
+    On-disk cache of extracted page text and validated structure JSON
+
+    Entries are keyed by the SHA-256 of the PDF bytes plus the parser and
+    prompt versions, so byte-identical files are never re-extracted or
+    re-analyzed, and prompt changes invalidate old entries. Chunk entries are
+    keyed by the chunk text, so unchanged sections of a revised PDF are reused.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+
+    @staticmethod
+    def make_key(content_hash: str, prompt_version: str) -> str:
+        return f"{content_hash}-p{PARSER_VERSION}-{prompt_version}"
+
+    @staticmethod
+    def make_chunk_key(chunk_text: str, analysis_version: str) -> str:
+        return f"{hash_text(chunk_text)}-chunk-p{PARSER_VERSION}-{analysis_version}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def load(self, key: str) -> Optional[Dict]:
+        """Return the cached entry ({"pages": [...], "structure": {...}}) or None"""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def store(self, key: str, pages: List[str], structure: Dict,
+              page_hashes: Optional[List[str]] = None) -> None:
+        write_json_atomic(self._path(key), {
+            "pages": pages,
+            "page_hashes": page_hashes or [hash_text(page) for page in pages],
+            "structure": structure
+        })
+
+    def load_chunk(self, key: str) -> Optional[Dict]:
+        """Return the cached structure for one analyzed chunk, or None"""
+        entry = self.load(key)
+        return entry.get("structure") if entry else None
+
+    def store_chunk(self, key: str, structure: Dict) -> None:
+        write_json_atomic(self._path(key), {"structure": structure})
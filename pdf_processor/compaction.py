@@ -0,0 +1,157 @@
+import math
+import re
+from collections import Counter
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+# Lines consisting only of a page marker, e.g. "3", "Page 3 of 14", "page 2 of 6 pages"
+PAGE_NUMBER_LINE = re.compile(r'^(?:page\s+)?\d+(?:\s*(?:of|/)\s*\d+)?(?:\s+pages?)?$', re.IGNORECASE)
+# A page marker embedded in a header/footer line
+PAGE_MARKER = re.compile(r'\bpage\s+\d+\s+of\s+\d+(?:\s+pages?)?\b', re.IGNORECASE)
+
+# Single lines that carry no information for structure analysis
+BOILERPLATE_LINES = (
+    re.compile(r"©\s*Queen's Printer", re.IGNORECASE),
+    re.compile(r'^Disponible en français$', re.IGNORECASE),
+)
+
+# (start, end) line patterns; the block runs from the start line up to, but not
+# including, the end line, or to the end of the document when end is None
+BOILERPLATE_BLOCKS = (
+    # Ontario standard lease: informational appendix after the signatures
+    (re.compile(r'^Appendix: General Information'), None),
+)
+
+# Header/footer zone inspected for lines repeated across pages
+EDGE_LINES = 3
+
+
+class CompactionStats(NamedTuple):
+    chars_before: int
+    chars_after: int
+    tokens_before: int
+    tokens_after: int
+    repeated_lines_removed: int
+    page_number_lines_removed: int
+    boilerplate_lines_removed: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English text)"""
+    return math.ceil(len(text) / 4)
+
+
+def _normalize(line: str) -> str:
+    """Normalize a line so headers/footers that differ only by numbers compare equal"""
+    return re.sub(r'\d+', '#', re.sub(r'\s+', ' ', line.strip().lower()))
+
+
+def _edge_lines(lines: Sequence[str]) -> List[str]:
+    if len(lines) <= EDGE_LINES * 2:
+        return list(lines)
+    return list(lines[:EDGE_LINES]) + list(lines[-EDGE_LINES:])
+
+
+def find_repeated_lines(pages: Sequence[Sequence[str]], min_fraction: float = 0.5) -> set:
+    """Return normalized header/footer lines that appear on at least min_fraction of the pages"""
+    if len(pages) < 2:
+        return set()
+    counts = Counter()
+    for lines in pages:
+        counts.update({_normalize(line) for line in _edge_lines(lines) if line.strip()})
+    threshold = max(2, math.ceil(len(pages) * min_fraction))
+    return {line for line, count in counts.items() if count >= threshold}
+
+
+def compact_pages(pages: Sequence[str], strip_boilerplate: bool = True,
+                  min_repeat_fraction: float = 0.5) -> Tuple[List[str], CompactionStats]:
+    """
+    Remove text that costs input tokens without describing the contract
+
+    Drops header/footer lines repeated across pages, page-number lines and
+    known boilerplate blocks, and collapses whitespace runs.
+
+    Args:
+        pages: Text of each page, in order
+        strip_boilerplate: Also remove BOILERPLATE_LINES and BOILERPLATE_BLOCKS
+        min_repeat_fraction: Share of pages a header/footer line must appear on
+
+    Returns:
+        (compacted pages, statistics)
+    """
+    split_pages = [(page or "").splitlines() for page in pages]
+    repeated = find_repeated_lines(split_pages, min_repeat_fraction)
+
+    repeated_removed = page_numbers_removed = boilerplate_removed = 0
+    in_block: Optional[re.Pattern] = None
+    block_to_end = False
+    compacted = []
+
+    for lines in split_pages:
+        edges = set(range(min(EDGE_LINES, len(lines)))) | set(range(max(0, len(lines) - EDGE_LINES), len(lines)))
+        # Page numbers only sit in the header or footer; a bare number in the body
+        # (a list index, an amount on its own line) is contract text
+        non_blank = [index for index, raw in enumerate(lines) if raw.strip()]
+        number_lines = {non_blank[0], non_blank[-1]} if non_blank else set()
+        kept = []
+        for index, raw in enumerate(lines):
+            line = re.sub(r'[ \t]+', ' ', raw).strip()
+            if not line:
+                continue
+
+            if strip_boilerplate:
+                if block_to_end:
+                    boilerplate_removed += 1
+                    continue
+                if in_block is not None:
+                    if in_block.search(line):
+                        in_block = None
+                    else:
+                        boilerplate_removed += 1
+                        continue
+                block_started = False
+                for start, end in BOILERPLATE_BLOCKS:
+                    if start.search(line):
+                        block_started = True
+                        if end is None:
+                            block_to_end = True
+                        else:
+                            in_block = end
+                        break
+                if block_started:
+                    boilerplate_removed += 1
+                    continue
+                if any(pattern.search(line) for pattern in BOILERPLATE_LINES):
+                    boilerplate_removed += 1
+                    continue
+
+            if index in number_lines and PAGE_NUMBER_LINE.match(line):
+                page_numbers_removed += 1
+                continue
+            if index in edges:
+                if _normalize(line) in repeated:
+                    repeated_removed += 1
+                    continue
+                if PAGE_MARKER.search(line):
+                    line = PAGE_MARKER.sub('', line).strip()
+                    page_numbers_removed += 1
+                    if not line:
+                        continue
+            kept.append(line)
+        compacted.append("\n".join(kept))
+
+    before = "\n".join(page or "" for page in pages)
+    after = "\n".join(page for page in compacted if page)
+    stats = CompactionStats(
+        chars_before=len(before),
+        chars_after=len(after),
+        tokens_before=estimate_tokens(before),
+        tokens_after=estimate_tokens(after),
+        repeated_lines_removed=repeated_removed,
+        page_number_lines_removed=page_numbers_removed,
+        boilerplate_lines_removed=boilerplate_removed
+    )
+    return compacted, stats
@@ -0,0 +1,131 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import pdfplumber
+
+
+class PageText(NamedTuple):
+    """Text extracted from a single PDF page"""
+    page_number: int  # 1-based
+    text: str
+    chars: int
+    seconds: float
+
+
+def count_pages(pdf_path: str) -> int:
+    """Return the number of pages in a PDF"""
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+def _release_page(page) -> None:
+    """Drop a page's parsed layout objects so they can be garbage collected"""
+    if hasattr(page, "close"):
+        page.close()
+    elif hasattr(page, "flush_cache"):
+        page.flush_cache()
+
+
+def iter_pages(pdf_path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[PageText]:
+    """
+    Yield text from pages [start, stop) of a PDF one page at a time
+
+    Each page's cached layout objects are released right after its text is
+    read, so memory use does not grow with the page count.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        pages = pdf.pages
+        stop = len(pages) if stop is None else min(stop, len(pages))
+        for index in range(start, stop):
+            page = pages[index]
+            began = time.perf_counter()
+            try:
+                text = page.extract_text() or ""
+            finally:
+                _release_page(page)
+            yield PageText(
+                page_number=index + 1,
+                text=text,
+                chars=len(text),
+                seconds=time.perf_counter() - began
+            )
+
+
+def extract_page_range(pdf_path: str, start: int = 0, stop: Optional[int] = None) -> List[PageText]:
+    """
+    Extract text from pages [start, stop) of a PDF
+
+    Opens the file itself so it can run in a worker process.
+    """
+    return list(iter_pages(pdf_path, start, stop))
+
+
+def _page_ranges(page_count: int, workers: int, tasks_per_worker: int = 4) -> List[tuple]:
+    """Split pages into contiguous ranges, several per worker to even out slow pages"""
+    task_count = max(1, min(page_count, workers * tasks_per_worker))
+    size = -(-page_count // task_count)  # ceil division
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def iter_pages_parallel(pdf_path: str, workers: Optional[int] = None,
+                        page_count: Optional[int] = None) -> Iterator[PageText]:
+    """
+    Extract text from all pages using a process pool, yielding pages in order
+
+    Each worker opens the PDF independently and handles a contiguous page
+    range; a range's pages are yielded as soon as it and all earlier ranges
+    are done, and each result is dropped once yielded.
+
+    Args:
+        pdf_path: Path to the PDF file
+        workers: Number of worker processes (defaults to CPU count)
+        page_count: Page count if already known
+    """
+    if page_count is None:
+        page_count = count_pages(pdf_path)
+    if page_count == 0:
+        return
+    workers = max(1, min(workers or os.cpu_count() or 1, page_count))
+
+    ranges = _page_ranges(page_count, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(extract_page_range, pdf_path, start, stop) for start, stop in ranges]
+        # Futures are consumed in submission order, which is page order
+        for index, future in enumerate(futures):
+            pages = future.result()
+            futures[index] = None
+            yield from pages
+
+
+def extract_pages_parallel(pdf_path: str, workers: Optional[int] = None,
+                           page_count: Optional[int] = None) -> List[PageText]:
+    """
+    Extract text from all pages using a process pool
+
+    Each worker opens the PDF independently and handles a contiguous page
+    range; results are returned in page order.
+
+    Args:
+        pdf_path: Path to the PDF file
+        workers: Number of worker processes (defaults to CPU count)
+        page_count: Page count if already known
+    """
+    return list(iter_pages_parallel(pdf_path, workers, page_count))
+
+
+def summarize_extraction(pages: List[PageText], wall_seconds: float) -> Dict:
+    """Build an extraction report with per-page timing and character counts"""
+    slowest = max(pages, key=lambda p: p.seconds) if pages else None
+    return {
+        "pages": len(pages),
+        "chars": sum(p.chars for p in pages),
+        "wall_seconds": wall_seconds,
+        "page_seconds": sum(p.seconds for p in pages),
+        "slowest_page": slowest.page_number if slowest else None,
+        "per_page": [
+            {"page": p.page_number, "chars": p.chars, "seconds": round(p.seconds, 4)}
+            for p in pages
+        ]
+    }
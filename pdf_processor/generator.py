@@ -3,50 +3,378 @@ from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import copy
+import hashlib
+import io
 import json
+import os
+import tempfile
+import time
+import zipfile
+
+# Chunk size used when streaming rendered PDFs
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Maximum number of static fragments kept per process
+FRAGMENT_CACHE_SIZE = 4096
+
+# Styles are built once per process and shared by every generator in it
+_STYLES = None
+
+
+def get_styles() -> Dict:
+    """Return the paragraph styles used for contracts, building them on first use"""
+    global _STYLES
+    if _STYLES is None:
+        styles = getSampleStyleSheet()
+        _STYLES = {
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontSize=16,
+                spaceAfter=30
+            ),
+            'heading': styles['Heading2'],
+            'body': styles['Normal']
+        }
+    return _STYLES
+
+
+def template_key(template_data: Dict) -> Tuple:
+    """Identify a template by id and version, or by a hash of its JSON"""
+    if template_data.get('id') is not None:
+        return (template_data['id'], template_data.get('version'))
+    template_json = template_data['template_json']
+    if not isinstance(template_json, str):
+        template_json = json.dumps(template_json, sort_keys=True)
+    return (hashlib.sha256(template_json.encode('utf-8')).hexdigest(), None)
+
+
+class StaticParagraph(Paragraph):
+    """
+    A Paragraph whose line breaking is computed once per frame width
+
+    Copies made with copy.copy share the parsed text and the wrap cache, so
+    every contract that contains the same static text reuses one layout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._wrap_cache = {}
+
+    def wrap(self, availWidth, availHeight):
+        cached = self._wrap_cache.get(availWidth)
+        if cached is None:
+            size = super().wrap(availWidth, availHeight)
+            self._wrap_cache[availWidth] = (size, getattr(self, 'blPara', None), getattr(self, '_wrapWidths', None))
+            return size
+        size, self.blPara, self._wrapWidths = cached
+        self.width, self.height = size
+        return size
+
+
+class FragmentCache:
+    """
+    LRU cache of static paragraph fragments
+
+    Keys are (template id, version, text hash), so a fragment is parsed and
+    laid out once per worker process and then copied into each contract.
+    """
+
+    def __init__(self, maxsize: int = FRAGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[StaticParagraph, ...]]" = OrderedDict()
+
+    def get(self, key: Tuple, build) -> List[Paragraph]:
+        """Return per-document copies of the fragment for key, building it with build() on a miss"""
+        fragment = self._entries.get(key)
+        if fragment is None:
+            self.misses += 1
+            fragment = self._entries[key] = tuple(build())
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return [copy.copy(paragraph) for paragraph in fragment]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'fragments': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
+
+
+# Shared by all generators in a process (one per worker in render_batch)
+FRAGMENTS = FragmentCache()
+
+
+def _text_paragraphs(text: str) -> List[str]:
+    """Split plain clause text into paragraphs on blank lines, escaping markup characters"""
+    blocks = [" ".join(line.strip() for line in block.splitlines()) for block in text.strip().split("\n\n")]
+    return [escape(block) for block in blocks if block]
+
 
 class ContractPDFGenerator:
     def __init__(self, template_data):
         self.template_data = template_data
-        self.styles = getSampleStyleSheet()
-    
-    def create_pdf(self, output_path, form_data):
-        """Create a filled PDF contract"""
-        doc = SimpleDocTemplate(
-            output_path,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Parse template JSON
-        template = json.loads(self.template_data['template_json'])
-        
-        # Build content
-        story = []
-        
-        # Add title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30
-        )
-        story.append(Paragraph(template['title'], title_style))
-        
-        # Add sections
+        self._template = None
+        self._key = template_key(template_data)
+
+    @property
+    def template(self) -> Dict:
+        """Parsed template JSON, parsed once per generator"""
+        if self._template is None:
+            template_json = self.template_data['template_json']
+            self._template = json.loads(template_json) if isinstance(template_json, str) else template_json
+        return self._template
+
+    def _static(self, text: str, style_name: str, plain: bool = False) -> List[Paragraph]:
+        """Cached paragraphs for text that is identical in every contract using this template"""
+        text_hash = hashlib.sha256(f"{style_name}\0{int(plain)}\0{text}".encode('utf-8')).hexdigest()
+
+        def build():
+            style = get_styles()[style_name]
+            blocks = _text_paragraphs(text) if plain else [escape(text)]
+            return [StaticParagraph(block, style) for block in blocks]
+
+        return FRAGMENTS.get((*self._key, text_hash), build)
+
+    def build_story(self, form_data, clauses: Optional[List[Dict]] = None) -> List:
+        """
+        Build the flowables for one filled contract
+
+        Titles, section text and standard clauses come from the fragment
+        cache; only field values and custom clauses are laid out per contract.
+
+        Args:
+            form_data: Field values keyed by field id
+            clauses: Clauses to append, each with 'title' and 'content';
+                clauses marked 'custom' are never cached
+        """
+        styles = get_styles()
+        template = self.template
+        story = self._static(template['title'], 'title')
+
         for section in template['sections']:
-            story.append(Paragraph(section['title'], self.styles['Heading2']))
-            
+            story.extend(self._static(section['title'], 'heading'))
+            if section.get('content'):
+                story.extend(self._static(section['content'], 'body', plain=True))
+
             for field in section['fields']:
                 field_id = field['id']
                 if field_id in form_data:
                     label = field['label']
                     value = form_data[field_id]
                     text = f"{label}: {value}"
-                    story.append(Paragraph(text, self.styles['Normal']))
-        
-        # Build PDF
-        doc.build(story)
+                    story.append(Paragraph(escape(text), styles['body']))
+
+        for clause in clauses or []:
+            if clause.get('custom'):
+                story.append(Paragraph(escape(clause.get('title', '')), styles['heading']))
+                story.extend(Paragraph(block, styles['body']) for block in _text_paragraphs(clause.get('content', '')))
+            else:
+                story.extend(self._static(clause.get('title', ''), 'heading'))
+                story.extend(self._static(clause.get('content', ''), 'body', plain=True))
+        return story
+
+    def write_pdf(self, target, form_data, clauses: Optional[List[Dict]] = None) -> int:
+        """
+        Render a filled PDF contract into target
+
+        Args:
+            target: A file path or a writable binary file object
+            form_data: Field values keyed by field id
+            clauses: Clauses appended after the template sections
+
+        Returns:
+            Number of pages written
+        """
+        doc = SimpleDocTemplate(
+            target,
+            pagesize=letter,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=72
+        )
+        doc.build(self.build_story(form_data, clauses))
+        return doc.page
+
+    def create_pdf(self, output_path, form_data, clauses: Optional[List[Dict]] = None) -> int:
+        """
+        Create a filled PDF contract
+
+        The file is written to a temporary file next to output_path and
+        renamed into place, so readers never see a partially written PDF.
+
+        Returns:
+            Number of pages written
+        """
+        directory = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.pdf.tmp')
+        os.close(fd)
+        try:
+            pages = self.write_pdf(tmp_path, form_data, clauses)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return pages
+
+    def render_to_buffer(self, form_data, buffer: Optional[BinaryIO] = None,
+                         clauses: Optional[List[Dict]] = None) -> BinaryIO:
+        """
+        Render a filled PDF contract into memory
+
+        Args:
+            form_data: Field values keyed by field id
+            buffer: Writable binary buffer to render into (a new BytesIO by default)
+            clauses: Clauses appended after the template sections
+
+        Returns:
+            The buffer, positioned at its start
+        """
+        if buffer is None:
+            buffer = io.BytesIO()
+        start = buffer.tell()
+        self.write_pdf(buffer, form_data, clauses)
+        buffer.seek(start)
+        return buffer
+
+    def render_bytes(self, form_data, clauses: Optional[List[Dict]] = None) -> bytes:
+        """Render a filled PDF contract and return its bytes"""
+        return self.render_to_buffer(form_data, clauses=clauses).getvalue()
+
+    def render_view(self, form_data, clauses: Optional[List[Dict]] = None) -> memoryview:
+        """Render a filled PDF contract and return a zero-copy view of the bytes"""
+        return self.render_to_buffer(form_data, clauses=clauses).getbuffer()
+
+    def iter_pdf_chunks(self, form_data, chunk_size: int = STREAM_CHUNK_SIZE,
+                        clauses: Optional[List[Dict]] = None) -> Iterator[memoryview]:
+        """
+        Render a contract in memory and yield it in chunks
+
+        Suitable for streaming HTTP responses; chunks are views into a single
+        in-memory buffer, so no bytes are copied and no temp file is created.
+        """
+        view = self.render_view(form_data, clauses)
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset:offset + chunk_size]
+
+    def write_to_zip(self, archive: zipfile.ZipFile, arcname: str, form_data,
+                     chunk_size: int = STREAM_CHUNK_SIZE, clauses: Optional[List[Dict]] = None) -> int:
+        """
+        Render a contract straight into a zip archive member
+
+        Returns:
+            Number of bytes written
+        """
+        written = 0
+        with archive.open(arcname, 'w') as member:
+            for chunk in self.iter_pdf_chunks(form_data, chunk_size, clauses):
+                member.write(chunk)
+                written += len(chunk)
+        return written
+
+
+class RenderJob(NamedTuple):
+    """One contract to render in a batch"""
+    template_data: Dict
+    form_data: Dict
+    output_path: str
+    clauses: Optional[List[Dict]] = None
+
+
+class BatchRenderReport(NamedTuple):
+    documents: int
+    pages: int
+    seconds: float
+    failed: List[Tuple[str, str]]  # (output_path, error)
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+# Per-worker state: templates sent once at pool start-up and generators built from them
+_WORKER_TEMPLATES: Dict[Tuple, Dict] = {}
+_WORKER_GENERATORS: Dict[Tuple, ContractPDFGenerator] = {}
+
+
+def _init_worker(templates: Dict[Tuple, Dict]) -> None:
+    _WORKER_TEMPLATES.clear()
+    _WORKER_TEMPLATES.update(templates)
+    _WORKER_GENERATORS.clear()
+
+
+def _worker_generator(key: Tuple) -> ContractPDFGenerator:
+    generator = _WORKER_GENERATORS.get(key)
+    if generator is None:
+        generator = _WORKER_GENERATORS[key] = ContractPDFGenerator(_WORKER_TEMPLATES[key])
+    return generator
+
+
+def _render_one(task: Tuple) -> Tuple[str, int, Optional[str]]:
+    """Render a single contract in a worker; returns (output_path, pages, error)"""
+    key, form_data, output_path, clauses = task
+    try:
+        return output_path, _worker_generator(key).create_pdf(output_path, form_data, clauses), None
+    except Exception as e:
+        return output_path, 0, f"{type(e).__name__}: {e}"
+
+
+def render_batch(jobs: Iterable, workers: Optional[int] = None, chunksize: int = 16) -> BatchRenderReport:
+    """
+    Render many contracts across a process pool
+
+    Each distinct template is sent to every worker once when the pool starts;
+    workers then parse it and build its styles once and reuse them for every
+    contract. A failed contract is reported and does not stop the batch.
+
+    Args:
+        jobs: RenderJob or (template_data, form_data, output_path[, clauses]) tuples
+        workers: Number of worker processes (defaults to CPU count)
+        chunksize: Contracts sent to a worker per task
+    """
+    templates: Dict[Tuple, Dict] = {}
+    tasks = []
+    for job in jobs:
+        job = RenderJob(*job)
+        key = template_key(job.template_data)
+        templates.setdefault(key, job.template_data)
+        tasks.append((key, job.form_data, job.output_path, job.clauses))
+    if not tasks:
+        return BatchRenderReport(0, 0, 0.0, [])
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    started = time.perf_counter()
+    documents = pages = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(templates,)) as executor:
+        for output_path, page_count, error in executor.map(_render_one, tasks, chunksize=max(1, chunksize)):
+            if error:
+                failed.append((output_path, error))
+            else:
+                documents += 1
+                pages += page_count
+
+    report = BatchRenderReport(documents, pages, time.perf_counter() - started, failed)
+    print(f"Rendered {report.documents} contracts ({report.pages} pages) in {report.seconds:.2f}s, "
+          f"{report.pages_per_second:.1f} pages/sec, {len(failed)} failed")
+    return report
@@ -1,11 +1,24 @@
-import pdfplumber
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
 from openai import OpenAI
 import sys
 from datetime import date
-from jsonschema import validate
+from jsonschema.validators import validator_for
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pdf_processor.extractor import (
+    count_pages,
+    iter_pages,
+    iter_pages_parallel,
+    summarize_extraction,
+    PageText
+)
+from pdf_processor.cache import ParseCache, hash_file, hash_text
+from pdf_processor.compaction import compact_pages
 
 class ContractParser:
     """Parse contract PDFs and convert to structured data"""
@@ -68,13 +81,178 @@ class ContractParser:
         }
     }
     
-    def __init__(self, api_key: str, api_base_url: str, model: str):
-        """Initialize the parser with API credentials"""
+    SYSTEM_PROMPT = """You are a legal document parser specializing in rental agreements.
+Analyze the rental agreement text and convert it to structured JSON format.
+Include all mandatory sections even if some information is implicit or missing.
+IMPORTANT: Return ONLY the JSON output without any additional text, explanation or markdown formatting."""
+
+    STRUCTURE_PROMPT = """Required structure:
+{
+    "title": "Contract Title",
+    "sections": [
+        {
+            "id": "section_id",
+            "title": "Section Title", 
+            "fields": [
+                {
+                    "name": "field_name",
+                    "label": "Display Label",
+                    "type": "field_type",  // Must be one of: text, number, date, select, multiselect, checkbox
+                    "required": true/false,
+                    "validation": {
+                        "min": number/date,    // For number/date fields
+                        "max": number/date,    // For number/date fields
+                        "pattern": "regex"     // For text fields (e.g. email, phone, postal code)
+                    },
+                    "options": []  // Required for select/multiselect/checkbox types
+                }
+            ]
+        }
+    ]
+}
+
+Note:
+- For phone numbers, use type "text" with appropriate pattern validation
+- For email addresses, use type "text" with email pattern validation
+- For long text fields, use type "text" with appropriate min/max validation
+- All select/multiselect/checkbox fields must have options array
+- Date fields can have date string format for min/max (e.g. "2023-01-01")
+"""
+
+    # 注意这里改用两个独立的字符串，而不是在模板中包含合同文本
+    INSTRUCTION_PROMPT = """Please convert this rental agreement into structured JSON with the following mandatory sections:
+1. Parties (landlord and tenant information)
+2. Rental Unit (property details)
+3. Term (start date, end date)
+4. Rent (amount, payment details)
+5. Security Deposit
+6. Utilities and Services
+7. Maintenance and Repairs
+8. Rights and Responsibilities
+
+""" + STRUCTURE_PROMPT
+
+    # Chunked mode: each chunk is one part of the document, so the mandatory-sections
+    # rule does not apply; standard ids let _merge_structures combine the parts
+    CHUNK_SYSTEM_PROMPT = """You are a legal document parser specializing in rental agreements.
+You will receive one part of a longer rental agreement; the other parts are analyzed separately.
+Convert only the text of this part to structured JSON. Do not add sections or fields that do not appear in this part.
+IMPORTANT: Return ONLY the JSON output without any additional text, explanation or markdown formatting."""
+
+    CHUNK_INSTRUCTION_PROMPT = """Please convert this part of a rental agreement into structured JSON.
+Include only the sections and fields that appear in this part; return an empty "sections" list if there are none.
+When a section matches one of the following, use the given id:
+parties, rental_unit, term, rent, security_deposit, utilities_services, maintenance_repairs, rights_responsibilities
+
+""" + STRUCTURE_PROMPT
+    
+    # Compiled once per process; see _get_schema_validator
+    _schema_validator = None
+    
+    @classmethod
+    def _get_schema_validator(cls):
+        """Return the shared validator, checking the schema itself only once"""
+        if cls._schema_validator is None:
+            validator_class = validator_for(cls.TEMPLATE_SCHEMA)
+            validator_class.check_schema(cls.TEMPLATE_SCHEMA)
+            cls._schema_validator = validator_class(cls.TEMPLATE_SCHEMA)
+        return cls._schema_validator
+    
+    @classmethod
+    def validate_structure(cls, structure: Dict) -> None:
+        """
+        Validate AI output against TEMPLATE_SCHEMA
+        
+        All violations are collected in a single pass.
+        
+        Raises:
+            ValueError: If the structure does not match the schema
+        """
+        errors = sorted(
+            cls._get_schema_validator().iter_errors(structure),
+            key=lambda e: list(e.absolute_path)
+        )
+        if errors:
+            details = "; ".join(
+                f"{'/'.join(str(p) for p in error.absolute_path) or '<root>'}: {error.message}"
+                for error in errors
+            )
+            raise ValueError(f"AI output does not match required schema ({len(errors)} errors): {details}")
+    
+    # Documents with at least this many pages are extracted in a process pool
+    PARALLEL_MIN_PAGES = 50
+    
+    # Chunked analysis: numbered section headings such as "5. Rent" start a new section
+    SECTION_HEADING_PATTERN = re.compile(r'^\s*(?:Section\s+|Part\s+)?\d{1,2}\.\s+[A-Z]', re.MULTILINE)
+    CHUNK_MAX_CHARS = 12000
+    CHUNK_PAGES = 4
+    
+    def __init__(self, api_key: str, api_base_url: str, model: str,
+                 extraction_workers: Optional[int] = None,
+                 cache: Optional[ParseCache] = None,
+                 chunked: bool = False,
+                 max_concurrency: int = 4,
+                 compact: bool = True,
+                 pack_sections: bool = True):
+        """
+        Initialize the parser with API credentials
+        
+        Args:
+            extraction_workers: Processes used for page-parallel text extraction
+                (defaults to CPU count; 1 disables the process pool)
+            cache: Content-hash cache for extracted text and parsed structure
+            chunked: Split the text on section headings (or page windows) and
+                analyze the chunks concurrently
+            max_concurrency: Maximum concurrent model requests in chunked mode
+            compact: Strip repeated headers/footers, page numbers, boilerplate
+                and whitespace runs before structure analysis
+            pack_sections: In chunked mode, pack several sections per chunk;
+                disable to keep chunk boundaries stable across revisions
+        """
         self.client = OpenAI(
             api_key=api_key,
             base_url=api_base_url
         )
         self.model = model
+        self.extraction_workers = extraction_workers
+        self.cache = cache
+        self.chunked = chunked
+        self.max_concurrency = max(1, max_concurrency)
+        self.compact = compact
+        self.pack_sections = pack_sections
+        self.last_compaction_stats = None
+        self.last_chunk_stats = None
+        self.last_page_hashes = None
+        self.last_extraction_stats = None
+        self.last_content_hash = None
+        self.last_cache_hit = False
+    
+    @property
+    def analysis_version(self) -> str:
+        """Short hash identifying the prompts and model used for structure analysis"""
+        digest = hashlib.sha256()
+        for part in (self.SYSTEM_PROMPT, self.INSTRUCTION_PROMPT, self.model):
+            digest.update(part.encode("utf-8"))
+        return digest.hexdigest()[:12]
+    
+    @property
+    def chunk_analysis_version(self) -> str:
+        """Short hash identifying the prompts and model used for per-chunk analysis"""
+        digest = hashlib.sha256()
+        for part in (self.CHUNK_SYSTEM_PROMPT, self.CHUNK_INSTRUCTION_PROMPT, self.model):
+            digest.update(part.encode("utf-8"))
+        return digest.hexdigest()[:12]
+    
+    @property
+    def prompt_version(self) -> str:
+        """Analysis version plus the preprocessing options that change the model input"""
+        digest = hashlib.sha256(self.analysis_version.encode("utf-8"))
+        if self.chunked:
+            digest.update(self.chunk_analysis_version.encode("utf-8"))
+            digest.update(f"chunked:{self.CHUNK_MAX_CHARS}:{self.CHUNK_PAGES}:{self.pack_sections}".encode("utf-8"))
+        if self.compact:
+            digest.update(b"compact")
+        return digest.hexdigest()[:12]
         
     def parse_pdf(self, pdf_path: str) -> Dict:
         """
@@ -94,99 +272,306 @@ class ContractParser:
         """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        
+        content_hash = hash_file(pdf_path)
+        cached = self.load_cached(content_hash)
+        if cached is not None:
+            return cached
             
-        # Extract text
-        text = self._extract_text(pdf_path)
-        if not text.strip():
+        # Extract text; page hashes are computed while the pages stream in
+        pages = self._extract_pages(pdf_path)
+        return self.parse_extracted(pages, content_hash, self.last_page_hashes)
+
+    def load_cached(self, content_hash: str) -> Optional[Dict]:
+        """Return the database-format result for a previously parsed PDF, or None"""
+        self.last_content_hash = content_hash
+        self.last_cache_hit = False
+        if not self.cache:
+            return None
+        cached = self.cache.load(ParseCache.make_key(content_hash, self.prompt_version))
+        if cached is None:
+            return None
+        self.last_cache_hit = True
+        self.last_page_hashes = cached.get("page_hashes")
+        return self._convert_to_db_format(cached["structure"])
+
+    def parse_extracted(self, pages: List[str], content_hash: Optional[str] = None,
+                        page_hashes: Optional[List[str]] = None) -> Dict:
+        """
+        Analyze already-extracted page text and return structured data
+        
+        Compaction, chunking and the single-request prompt all look at the
+        whole document, so this stage needs every page's text at once.
+        
+        Args:
+            pages: Text of each page, in order
+            content_hash: SHA-256 of the source PDF; the result is cached under it
+            page_hashes: Hashes of pages, if already computed during extraction
+        """
+        if not any(page.strip() for page in pages):
             raise ValueError("No text could be extracted from PDF")
+        self.last_content_hash = content_hash
+        self.last_page_hashes = page_hashes or [hash_text(page) for page in pages]
             
         # Analyze structure using AI
-        structure = self._analyze_structure(text)
+        structure = self._analyze_pages(pages, self.compact)
         
         # Validate structure against schema
-        try:
-            validate(instance=structure, schema=self.TEMPLATE_SCHEMA)
-        except Exception as e:
-            raise ValueError(f"AI output does not match required schema: {str(e)}")
+        self.validate_structure(structure)
+        
+        if self.cache and content_hash:
+            self.cache.store(ParseCache.make_key(content_hash, self.prompt_version), pages, structure,
+                             self.last_page_hashes)
         
         # Convert to database format
         return self._convert_to_db_format(structure)
 
-    def _extract_text(self, pdf_path: str) -> str:
-        """Extract text from PDF with error handling"""
-        text_content = []
+    def page_hashes(self, pdf_path: str) -> List[str]:
+        """Hash each page's text, reusing the parse cache when the file was seen before"""
+        if self.cache:
+            cached = self.cache.load(ParseCache.make_key(hash_file(pdf_path), self.prompt_version))
+            if cached and cached.get("page_hashes"):
+                return cached["page_hashes"]
+        return [hash_text(page.text) for page in self.iter_page_text(pdf_path)]
+
+    def iter_page_text(self, pdf_path: str) -> Iterator[PageText]:
+        """
+        Stream page text in bounded memory
         
+        Pages are parsed and released one at a time; consumers that do not
+        need the whole document at once should read from this stream.
+        """
+        try:
+            yield from iter_pages(pdf_path)
+        except Exception as e:
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+
+    def _extract_pages(self, pdf_path: str) -> List[str]:
+        """
+        Extract the text of each page, in page order
+        
+        Pages are consumed from a stream; only their text, hash (kept in
+        last_page_hashes) and timing are retained.
+        """
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        text_content.append(text)
+            started = time.perf_counter()
+            page_count = count_pages(pdf_path)
+            if page_count >= self.PARALLEL_MIN_PAGES and self.extraction_workers != 1:
+                stream = iter_pages_parallel(pdf_path, self.extraction_workers, page_count)
+            else:
+                stream = iter_pages(pdf_path)
+            texts, hashes, stats = [], [], []
+            for page in stream:
+                texts.append(page.text)
+                hashes.append(hash_text(page.text))
+                stats.append(page._replace(text=""))
+            self.last_page_hashes = hashes
+            
+            self.last_extraction_stats = summarize_extraction(stats, time.perf_counter() - started)
+            print(f"Extracted {self.last_extraction_stats['chars']} chars from "
+                  f"{self.last_extraction_stats['pages']} pages in "
+                  f"{self.last_extraction_stats['wall_seconds']:.2f}s")
                         
-            return "\n".join(text_content)
+            return texts
             
         except Exception as e:
             raise ValueError(f"Failed to extract text from PDF: {str(e)}")
 
-    def _analyze_structure(self, contract_text: str) -> Dict:
-        """Use AI to analyze contract structure"""
-        system_prompt = """You are a legal document parser specializing in rental agreements.
-Analyze the rental agreement text and convert it to structured JSON format.
-Include all mandatory sections even if some information is implicit or missing.
-IMPORTANT: Return ONLY the JSON output without any additional text, explanation or markdown formatting."""
+    def _extract_text(self, pdf_path: str) -> str:
+        """Extract text from PDF with error handling"""
+        return "\n".join(page for page in self._extract_pages(pdf_path) if page)
 
-        # 注意这里改用两个独立的字符串，而不是在模板中包含合同文本
-        instruction_prompt = """Please convert this rental agreement into structured JSON with the following mandatory sections:
-1. Parties (landlord and tenant information)
-2. Rental Unit (property details)
-3. Term (start date, end date)
-4. Rent (amount, payment details)
-5. Security Deposit
-6. Utilities and Services
-7. Maintenance and Repairs
-8. Rights and Responsibilities
+    def _analyze_pages(self, pages: List[str], compact: bool) -> Dict:
+        """Optionally compact extracted pages, then run structure analysis"""
+        if compact:
+            pages, self.last_compaction_stats = compact_pages(pages)
+            stats = self.last_compaction_stats
+            print(f"Compaction saved ~{stats.tokens_saved} tokens "
+                  f"({stats.tokens_before} -> {stats.tokens_after})")
+        
+        if self.chunked:
+            return self._analyze_chunks(self._split_into_chunks(pages))
+        return self._analyze_structure("\n".join(page for page in pages if page))
 
-Required structure:
-{
-    "title": "Contract Title",
-    "sections": [
-        {
-            "id": "section_id",
-            "title": "Section Title", 
-            "fields": [
-                {
-                    "name": "field_name",
-                    "label": "Display Label",
-                    "type": "field_type",  // Must be one of: text, number, date, select, multiselect, checkbox
-                    "required": true/false,
-                    "validation": {
-                        "min": number/date,    // For number/date fields
-                        "max": number/date,    // For number/date fields
-                        "pattern": "regex"     // For text fields (e.g. email, phone, postal code)
-                    },
-                    "options": []  // Required for select/multiselect/checkbox types
-                }
+    def compare_compaction(self, pdf_path: str) -> Dict:
+        """
+        Analyze a PDF with and without compaction and compare the results
+        
+        Returns:
+            Dict with both structures, the compaction statistics, and the
+            section ids / field names found by only one of the two runs
+        """
+        pages = self._extract_pages(pdf_path)
+        full = self._analyze_pages(pages, compact=False)
+        compacted = self._analyze_pages(pages, compact=True)
+        
+        def field_names(structure: Dict) -> set:
+            return {
+                field.get("name")
+                for section in structure.get("sections", [])
+                for field in section.get("fields", [])
+            }
+        
+        def section_ids(structure: Dict) -> set:
+            return {section.get("id") for section in structure.get("sections", [])}
+        
+        return {
+            "stats": self.last_compaction_stats._asdict(),
+            "tokens_saved": self.last_compaction_stats.tokens_saved,
+            "without_compaction": full,
+            "with_compaction": compacted,
+            "sections_only_without": sorted(section_ids(full) - section_ids(compacted), key=str),
+            "sections_only_with": sorted(section_ids(compacted) - section_ids(full), key=str),
+            "fields_only_without": sorted(field_names(full) - field_names(compacted), key=str),
+            "fields_only_with": sorted(field_names(compacted) - field_names(full), key=str)
+        }
+
+    def _split_into_chunks(self, pages: List[str]) -> List[str]:
+        """
+        Split page text into analysis chunks
+        
+        Text is cut at numbered section headings and consecutive sections are
+        packed into chunks of at most CHUNK_MAX_CHARS. Documents without
+        recognizable headings fall back to windows of CHUNK_PAGES pages.
+        """
+        text = "\n".join(page for page in pages if page)
+        starts = [m.start() for m in self.SECTION_HEADING_PATTERN.finditer(text)]
+        
+        if len(starts) < 2:
+            return [
+                "\n".join(page for page in pages[i:i + self.CHUNK_PAGES] if page)
+                for i in range(0, len(pages), self.CHUNK_PAGES)
+                if any(pages[i:i + self.CHUNK_PAGES])
             ]
+        
+        if starts[0] != 0:
+            starts.insert(0, 0)
+        sections = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+        
+        chunks, current = [], ""
+        for section in sections:
+            if current and (not self.pack_sections or len(current) + len(section) > self.CHUNK_MAX_CHARS):
+                chunks.append(current)
+                current = ""
+            if len(section) > self.CHUNK_MAX_CHARS:
+                # Oversized section: cut at line boundaries
+                for line in section.splitlines(keepends=True):
+                    if current and len(current) + len(line) > self.CHUNK_MAX_CHARS:
+                        chunks.append(current)
+                        current = ""
+                    current += line
+                continue
+            current += section
+        if current.strip():
+            chunks.append(current)
+        return chunks
+
+    def _analyze_chunks(self, chunks: List[str]) -> Dict:
+        """
+        Analyze chunks concurrently and merge their sections
+        
+        With a cache configured, chunks whose text was analyzed before are
+        reused and only new or changed chunks are sent to the model. A single
+        chunk is the whole document and is analyzed with the full prompt, so
+        its result is cached under analysis_version rather than being shared
+        with per-part results.
+        """
+        version = self.chunk_analysis_version if len(chunks) > 1 else self.analysis_version
+        results: List[Optional[Dict]] = [None] * len(chunks)
+        pending = []
+        for index, chunk in enumerate(chunks):
+            cached = None
+            if self.cache:
+                cached = self.cache.load_chunk(ParseCache.make_chunk_key(chunk, version))
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append(index)
+        
+        started = time.perf_counter()
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pending))) as executor:
+                part = (lambda i: (i + 1, len(chunks))) if len(chunks) > 1 else (lambda i: None)
+                futures = {
+                    index: executor.submit(self._analyze_structure, chunks[index], part(index))
+                    for index in pending
+                }
+                for index, future in futures.items():
+                    results[index] = future.result()
+                    if self.cache:
+                        self.cache.store_chunk(
+                            ParseCache.make_chunk_key(chunks[index], version),
+                            results[index]
+                        )
+        
+        self.last_chunk_stats = {
+            "chunks": len(chunks),
+            "reused": len(chunks) - len(pending),
+            "analyzed": len(pending)
         }
-    ]
-}
+        print(f"Analyzed {len(pending)} of {len(chunks)} chunks "
+              f"({len(chunks) - len(pending)} reused) in {time.perf_counter() - started:.2f}s")
+        
+        if len(results) == 1:
+            return results[0]
+        return self._merge_structures(results)
 
-Note:
-- For phone numbers, use type "text" with appropriate pattern validation
-- For email addresses, use type "text" with email pattern validation
-- For long text fields, use type "text" with appropriate min/max validation
-- All select/multiselect/checkbox fields must have options array
-- Date fields can have date string format for min/max (e.g. "2023-01-01")
-"""
+    @staticmethod
+    def _merge_structures(results: List[Dict]) -> Dict:
+        """
+        Merge per-chunk structures in chunk order
+        
+        Sections with the same id are combined, and within each merged section
+        a field name is kept only at its first occurrence; the same name may
+        still appear in different sections (e.g. rent and security deposit
+        amounts).
+        """
+        title = next((r.get("title") for r in results if r.get("title")), "")
+        sections: Dict[str, Dict] = {}
+        seen_fields: Dict[str, set] = {}
+        
+        for result in results:
+            for section in result.get("sections", []):
+                section_id = section.get("id") or section.get("title", "")
+                merged = sections.setdefault(section_id, {
+                    **{k: v for k, v in section.items() if k != "fields"},
+                    "fields": []
+                })
+                seen = seen_fields.setdefault(section_id, set())
+                for field in section.get("fields", []):
+                    name = field.get("name")
+                    if name in seen:
+                        continue
+                    seen.add(name)
+                    merged["fields"].append(field)
+        
+        return {"title": title, "sections": list(sections.values())}
 
+    def _analyze_structure(self, contract_text: str, part: Optional[tuple] = None) -> Dict:
+        """
+        Use AI to analyze contract structure
+        
+        Args:
+            contract_text: Text to analyze
+            part: (index, total) when the text is one chunk of a larger document
+        """
+        if part:
+            messages = [
+                {"role": "system", "content": self.CHUNK_SYSTEM_PROMPT},
+                {"role": "user", "content": self.CHUNK_INSTRUCTION_PROMPT},
+                {"role": "user", "content": f"This is part {part[0]} of {part[1]} of the contract."}
+            ]
+        else:
+            messages = [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": self.INSTRUCTION_PROMPT}
+            ]
+        messages.append({"role": "user", "content": f"Here is the contract text to analyze:\n\n{contract_text}"})
+        
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": instruction_prompt},
-                    {"role": "user", "content": f"Here is the contract text to analyze:\n\n{contract_text}"}
-                ],
+                messages=messages,
                 temperature=0.1,  # Low temperature for more consistent output
                 stream=False
             )
@@ -244,7 +629,13 @@ Note:
             "province": None  # Will be set by import_contract_template
         }
 
-def import_contract_template(pdf_path: str, province: str, api_key: str, api_base_url: str, model: str) -> Optional[Dict]:
+# Template imports analyze one section per chunk, so the parse cache holds an
+# entry for every section and import_template_revision only re-analyzes the
+# sections a revision changed
+TEMPLATE_IMPORT_OPTIONS = {"chunked": True, "pack_sections": False}
+
+def import_contract_template(pdf_path: str, province: str, api_key: str, api_base_url: str, model: str,
+                             cache_dir: Optional[str] = None, use_cache: bool = True) -> Optional[Dict]:
     """
     Import contract template to database
     
@@ -254,6 +645,8 @@ def import_contract_template(pdf_path: str, province: str, api_key: str, api_bas
         api_key: OpenAI API key
         api_base_url: OpenAI API base URL
         model: Model name to use
+        cache_dir: Directory for the parse cache (defaults to data/cache/parser)
+        use_cache: Reuse extracted text and structure for byte-identical PDFs
         
     Returns:
         ContractTemplate object or None if import fails
@@ -262,20 +655,26 @@ def import_contract_template(pdf_path: str, province: str, api_key: str, api_bas
         print(f"Error: PDF file not found at {pdf_path}")
         return None
         
-    parser = ContractParser(api_key, api_base_url, model)
+    cache = ParseCache(cache_dir) if use_cache else None
+    parser = ContractParser(api_key, api_base_url, model, cache=cache, **TEMPLATE_IMPORT_OPTIONS)
     session = None
     
     try:
         template_data = parser.parse_pdf(pdf_path)
         template_data['province'] = province
+        template_data['content_hash'] = parser.last_content_hash
+        if parser.last_cache_hit:
+            print(f"Parse cache hit for {pdf_path} ({parser.last_content_hash[:12]})")
         
         from database.orm import ContractTemplate, get_db_session
+        from database.repository import TemplateRepository
         session, _ = get_db_session()  # 忽略返回的engine
-        template = ContractTemplate(**template_data)
-        session.add(template)
+        # Re-importing the same file updates the existing row instead of adding a duplicate
+        template_id = TemplateRepository(session).upsert(template_data)
         session.commit()
+        template = session.get(ContractTemplate, template_id)
         
-        print(f"Successfully imported contract template for {province}")
+        print(f"Successfully imported contract template for {province} (template id {template_id})")
         return template
         
     except Exception as e:
@@ -288,6 +687,136 @@ def import_contract_template(pdf_path: str, province: str, api_key: str, api_bas
         if session:
             session.close()
 
+def _next_version(version: Optional[str]) -> str:
+    """Bump the last numeric component of a version string ("1.0" -> "1.1")"""
+    if not version:
+        return "1.0"
+    head, _, tail = version.rpartition('.')
+    if head and tail.isdigit():
+        return f"{head}.{int(tail) + 1}"
+    if version.isdigit():
+        return str(int(version) + 1)
+    return f"{version}.1"
+
+def _share_unchanged_sections(previous_sections, new_sections: list) -> tuple:
+    """
+    Reuse the previous version's JSON for sections whose content is unchanged
+    
+    Returns:
+        (sections, unchanged section ids, changed section ids)
+    """
+    if isinstance(previous_sections, str):
+        previous_sections = json.loads(previous_sections)
+    previous_by_id = {
+        section.get('id'): section
+        for section in previous_sections or []
+        if isinstance(section, dict)
+    }
+    
+    sections, unchanged, changed = [], [], []
+    for section in new_sections:
+        previous = previous_by_id.get(section.get('id'))
+        if previous == section:
+            sections.append(previous)
+            unchanged.append(section.get('id'))
+        else:
+            sections.append(section)
+            changed.append(section.get('id'))
+    return sections, unchanged, changed
+
+def import_template_revision(pdf_path: str, previous_template_id: int, api_key: str, api_base_url: str,
+                             model: str, cache_dir: Optional[str] = None,
+                             previous_pdf_path: Optional[str] = None) -> Optional[Dict]:
+    """
+    Import a revised PDF as a new version of an existing template
+    
+    The document is analyzed section by section, like every template import
+    (TEMPLATE_IMPORT_OPTIONS). Sections whose text is unchanged since an earlier
+    import are served from the parse cache, so only changed sections are sent
+    to the model, and the new version reuses the previous version's JSON for
+    every section that did not change.
+    
+    Args:
+        pdf_path: Path to the revised PDF
+        previous_template_id: ContractTemplate the revision replaces
+        api_key: OpenAI API key
+        api_base_url: OpenAI API base URL
+        model: Model name to use
+        cache_dir: Directory for the parse cache (defaults to data/cache/parser)
+        previous_pdf_path: Previous PDF, used to report which pages changed
+        
+    Returns:
+        The new ContractTemplate object or None if import fails
+    """
+    if not os.path.exists(pdf_path):
+        print(f"Error: PDF file not found at {pdf_path}")
+        return None
+    
+    parser = ContractParser(api_key, api_base_url, model, cache=ParseCache(cache_dir),
+                            **TEMPLATE_IMPORT_OPTIONS)
+    session = None
+    
+    try:
+        from database.orm import ContractTemplate, get_db_session
+        session, _ = get_db_session()
+        previous = session.get(ContractTemplate, previous_template_id)
+        if previous is None:
+            print(f"Error: previous template {previous_template_id} not found")
+            return None
+        
+        # A byte-identical file would hit the (province, type, content_hash) conflict
+        # and rewrite the existing row instead of adding a revision
+        from database.repository import TemplateRepository
+        existing = TemplateRepository(session).find_by_source(previous.type, previous.province, hash_file(pdf_path))
+        if existing is not None:
+            print(f"Error: {pdf_path} is identical to the file already imported as "
+                  f"template {existing.id} (version {existing.version}); not a new revision")
+            return None
+        
+        template_data = parser.parse_pdf(pdf_path)
+        
+        if previous_pdf_path and os.path.exists(previous_pdf_path) and parser.last_page_hashes:
+            old_hashes = parser.page_hashes(previous_pdf_path)
+            new_hashes = parser.last_page_hashes
+            changed_pages = [
+                number for number in range(1, max(len(old_hashes), len(new_hashes)) + 1)
+                if old_hashes[number - 1:number] != new_hashes[number - 1:number]
+            ]
+            print(f"Changed pages: {changed_pages or 'none'}")
+        if parser.last_chunk_stats:
+            print(f"Sections analyzed: {parser.last_chunk_stats['analyzed']}, "
+                  f"reused from cache: {parser.last_chunk_stats['reused']}")
+        
+        sections, unchanged, changed = _share_unchanged_sections(previous.sections, template_data['sections'])
+        print(f"Unchanged sections: {len(unchanged)}, changed or new: {changed}")
+        
+        template_id = TemplateRepository(session).upsert({
+            **template_data,
+            'type': previous.type,
+            'province': previous.province,
+            'property_types': previous.property_types or template_data['property_types'],
+            'features': previous.features or template_data['features'],
+            'version': _next_version(previous.version),
+            'sections': sections,
+            'content_hash': parser.last_content_hash
+        })
+        session.commit()
+        template = session.get(ContractTemplate, template_id)
+        
+        print(f"Imported {previous.province} template version {template.version} "
+              f"(previous: {previous.version})")
+        return template
+        
+    except Exception as e:
+        print(f"Error importing template revision: {str(e)}")
+        if session:
+            session.rollback()
+        return None
+        
+    finally:
+        if session:
+            session.close()
+
 if __name__ == "__main__":
     # Example usage
     import sys, os
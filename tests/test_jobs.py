@@ -0,0 +1,55 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import socket
+import sqlite3
+import subprocess
+
+from core.jobs import FAILED, QUEUED, SUCCEEDED, JobQueue, JobStore
+
+
+def test_new_queue_leaves_live_queue_jobs_alone(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    first = JobQueue(db_path)
+    try:
+        job_id = first.store.create('export', first.owner)
+        second = JobQueue(db_path)
+        second.shutdown()
+        assert first.status(job_id)['status'] == QUEUED
+    finally:
+        first.shutdown()
+
+
+def test_jobs_of_dead_worker_are_failed(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    store = JobStore(db_path)
+    job_id = store.create('export', f"{socket.gethostname()}:{process.pid}:dead")
+    store.close()
+
+    queue = JobQueue(db_path)
+    try:
+        job = queue.status(job_id)
+        assert job['status'] == FAILED
+        assert 'worker stopped' in job['error']
+        done = queue.wait(queue.submit('export', lambda progress: 'ok'), timeout=5)
+        assert done['status'] == SUCCEEDED and done['result'] == 'ok'
+    finally:
+        queue.shutdown()
+
+
+def test_old_job_database_gains_owner_columns(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                 "done INTEGER DEFAULT 0, total INTEGER, message TEXT, result TEXT, error TEXT, "
+                 "created_at TEXT, updated_at TEXT)")
+    conn.commit()
+    conn.close()
+
+    store = JobStore(db_path)
+    try:
+        job_id = store.create('export', 'host:1:boot')
+        assert store.get(job_id)['owner'] == 'host:1:boot'
+    finally:
+        store.close()
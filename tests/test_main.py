@@ -0,0 +1,43 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import json
+import types
+
+import main
+
+
+class FakeAssistant:
+    """与 ContractAssistant._apply_modifications 一样就地修改 state.current_contract"""
+
+    def interact_with_ai(self, user_input, interaction_type="modification", state=None):
+        mod = {'type': 'clause', 'action': 'add', 'target': 'pets',
+               'value': {'content': '', 'variables': {'count': 2}}}
+        state.current_contract.setdefault('special_clauses', []).append(
+            {'type': mod['target'], 'content': '', 'variables': mod['value']['variables']}
+        )
+        return {'modifications': [mod]}
+
+
+class FakeGenerator:
+    def modify_contract(self, contract, modifications):
+        for mod in modifications:
+            contract.setdefault('special_clauses', []).append(
+                {'type': mod['target'], 'content': f"Pets allowed: {mod['value']['variables']['count']}"}
+            )
+            contract['modification_history'].append({'modification': mod})
+        return contract
+
+
+def test_modify_applies_each_modification_once(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'core.assistance', types.SimpleNamespace(ContractAssistant=FakeAssistant))
+    monkeypatch.setitem(sys.modules, 'core.ContractGenerator', types.SimpleNamespace(ContractGenerator=FakeGenerator))
+    path = tmp_path / 'contract.json'
+    path.write_text(json.dumps({'type': 'lease', 'sections': {}, 'special_clauses': [],
+                                'modification_history': []}), encoding='utf-8')
+
+    main.cmd_modify(argparse.Namespace(contract=str(path), modifications='允许养两只宠物', output=None))
+
+    saved = json.loads(path.read_text(encoding='utf-8'))
+    assert [c['content'] for c in saved['special_clauses']] == ['Pets allowed: 2']
+    assert len(saved['modification_history']) == 1
@@ -0,0 +1,69 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_processor.parser import ContractParser
+
+
+def _field(name):
+    return {'name': name, 'type': 'number', 'required': True}
+
+
+def test_merge_keeps_same_field_name_in_different_sections():
+    merged = ContractParser._merge_structures([
+        {'title': 'Lease', 'sections': [{'id': 'rent', 'title': 'Rent', 'fields': [_field('amount')]}]},
+        {'title': '', 'sections': [
+            {'id': 'security_deposit', 'title': 'Security Deposit', 'fields': [_field('amount')]},
+            {'id': 'rent', 'title': 'Rent', 'fields': [_field('amount'), _field('due_day')]},
+        ]},
+    ])
+
+    assert merged['title'] == 'Lease'
+    fields = {section['id']: [f['name'] for f in section['fields']] for section in merged['sections']}
+    # 同一章节内去重，不同章节的同名字段都保留
+    assert fields == {'rent': ['amount', 'due_day'], 'security_deposit': ['amount']}
+
+
+def test_single_chunk_result_is_not_reused_as_a_part(tmp_path):
+    from pdf_processor.cache import ParseCache
+
+    parser = ContractParser('test-key', 'http://localhost', 'test-model',
+                            cache=ParseCache(str(tmp_path)), chunked=True)
+    calls = []
+
+    def analyze(text, part=None):
+        calls.append(part)
+        return {'title': 'Lease', 'sections': [{'id': text.strip()[:2], 'title': text.strip(), 'fields': []}]}
+
+    parser._analyze_structure = analyze
+    parser._analyze_chunks(['1. Rent\n'])
+    parser._analyze_chunks(['1. Rent\n', '2. Term\n'])
+
+    # 单块文档使用完整提示，其结果不能作为多块文档中某一部分的结果复用
+    assert calls == [None, (1, 2), (2, 2)]
+
+
+def test_revision_reanalyzes_only_changed_sections_after_normal_import(tmp_path):
+    from pdf_processor.cache import ParseCache
+    from pdf_processor.parser import TEMPLATE_IMPORT_OPTIONS
+
+    analyzed = []
+
+    def new_parser():
+        parser = ContractParser('test-key', 'http://localhost', 'test-model',
+                                cache=ParseCache(str(tmp_path)), **TEMPLATE_IMPORT_OPTIONS)
+
+        def analyze(text, part=None):
+            analyzed.append(text.strip().splitlines()[0])
+            return {'title': 'Lease', 'sections': [{'id': text.strip()[:1], 'title': text.strip(), 'fields': []}]}
+
+        parser._analyze_structure = analyze
+        return parser
+
+    pages = ['1. Parties\nLandlord and tenant.', '2. Rent\nRent is due monthly.', '3. Term\nOne year.']
+    new_parser().parse_extracted(pages, 'a' * 64)
+    revised = pages[:1] + ['2. Rent\nRent is due on the first day of each month.'] + pages[2:]
+    new_parser().parse_extracted(revised, 'b' * 64)
+
+    # 首次导入按章节写入缓存，修订版只重新分析改动的章节
+    assert sorted(analyzed[:3]) == ['1. Parties', '2. Rent', '3. Term']
+    assert analyzed[3:] == ['2. Rent']
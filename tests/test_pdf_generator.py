@@ -0,0 +1,25 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import io
+
+from pdf_processor.generator import ContractPDFGenerator
+
+
+def test_database_text_with_markup_characters_renders():
+    template = {
+        'title': 'Lease <Ontario> & Schedule A',
+        'sections': [{
+            'title': 'Rent & Deposit',
+            'content': 'Rent < $2000 & deposit.',
+            'fields': [{'id': 'rent', 'label': 'Rent <monthly>'}]
+        }]
+    }
+    generator = ContractPDFGenerator({'template_json': template})
+    clauses = [{'title': 'Pets & <Animals>', 'content': 'One cat & one dog.'}]
+
+    story = generator.build_story({'rent': 'A & B'}, clauses)
+    assert [p.getPlainText() for p in story] == [
+        'Lease <Ontario> & Schedule A', 'Rent & Deposit', 'Rent < $2000 & deposit.',
+        'Rent <monthly>: A & B', 'Pets & <Animals>', 'One cat & one dog.'
+    ]
+    assert generator.write_pdf(io.BytesIO(), {'rent': 'A & B'}, clauses) == 1
@@ -0,0 +1,73 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database.orm import ContractTemplate, SpecialClause
+from database.repository import ClauseRepository, TemplateRepository
+
+
+def _session():
+    engine = create_engine('sqlite://')
+    SpecialClause.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(SpecialClause(clause_type='pets', category='pets', title='Pets', content='Pets allowed.'))
+    session.commit()
+    return session
+
+
+def test_cache_stats_count_only_own_statements():
+    session = _session()
+    first, second = ClauseRepository(session), ClauseRepository(session)
+
+    assert first.get_by_type('pets').title == 'Pets'
+    first.get_by_type('pets')
+    second.list_by_category('pets')
+
+    assert first.stats['executions'] == 2
+    assert second.stats['executions'] == 1
+
+
+def test_close_removes_engine_listener():
+    session = _session()
+    repository = ClauseRepository(session)
+    repository.close()
+
+    assert not event.contains(session.get_bind(), 'after_cursor_execute', repository._record_cache_usage)
+
+
+def _template_session():
+    engine = create_engine('sqlite://')
+    ContractTemplate.__table__.create(engine)
+    return sessionmaker(bind=engine)()
+
+
+def _template_row(**fields):
+    return {'type': 'lease', 'province': 'ON', 'version': '1.0', 'content_hash': 'a' * 64,
+            'sections': [{'id': 'rent'}], 'features': {}, 'property_types': ['condo'], **fields}
+
+
+def test_upsert_reimport_updates_existing_row():
+    session = _template_session()
+    repository = TemplateRepository(session)
+
+    first = repository.upsert(_template_row())
+    assert repository.upsert(_template_row()) == first
+    assert repository.upsert(_template_row(version='1.1')) == first
+    other = repository.upsert(_template_row(content_hash='b' * 64))
+
+    assert other != first
+    assert session.get(ContractTemplate, first).version == '1.1'
+
+
+def test_upsert_without_on_conflict_support(monkeypatch):
+    session = _template_session()
+    repository = TemplateRepository(session)
+    # 模拟不支持 ON CONFLICT 的方言，走逐行查询再写入的路径
+    monkeypatch.setattr(repository, '_insert', lambda: None)
+
+    ids = repository.upsert_many([_template_row(), _template_row(content_hash='b' * 64), _template_row(version='2.0')])
+
+    assert ids[0] == ids[2] != ids[1]
+    assert session.get(ContractTemplate, ids[0]).version == '2.0'
@@ -0,0 +1,33 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from core import session as session_module
+from core.session import SessionState, SQLiteSessionStore, StaleSessionError
+
+
+def test_sqlite_store_round_trip_and_stale_write(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.db'), codec='json')
+    state = SessionState('user-1')
+    state.contract = {'type': 'lease', 'sections': {'rent': {'amount': 2000}}}
+    store.save(state)
+
+    first, second = store.load('user-1'), store.load('user-1')
+    assert first.contract == state.contract
+    assert store.stats()['encoding'] == 'json+zlib'
+
+    first.contract['type'] = 'sublease'
+    store.save(first)
+    # 另一个 worker 基于旧版本写入时必须失败，而不是覆盖
+    with pytest.raises(StaleSessionError):
+        store.save(second)
+    assert store.load('user-1').contract['type'] == 'sublease'
+
+
+def test_msgpack_codec_without_msgpack_fails_at_construction(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_module, 'msgpack', None)
+    with pytest.raises(RuntimeError):
+        SQLiteSessionStore(str(tmp_path / 'sessions.db'), codec='msgpack')
+    with pytest.raises(ValueError):
+        SQLiteSessionStore(str(tmp_path / 'sessions.db'), codec='pickle')
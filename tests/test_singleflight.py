@@ -0,0 +1,62 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+class Cancelled(BaseException):
+    pass
+
+
+def _run_coalesced(flight, fn):
+    """leader 执行 fn 期间启动一个等待者，返回等待者的结果或异常"""
+    started, outcome = threading.Event(), {}
+
+    def leader_fn():
+        started.set()
+        # 等待者进入等待后 leader 才结束
+        while flight.stats()['coalesced'] == 0:
+            pass
+        return fn()
+
+    def waiter():
+        started.wait()
+        try:
+            outcome['result'] = flight.do('key', fn)
+        except BaseException as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    try:
+        outcome['leader'] = flight.do('key', leader_fn)
+    except BaseException as e:
+        outcome['leader_error'] = e
+    thread.join()
+    return outcome
+
+
+def test_waiter_gets_independent_copy_of_result():
+    flight = SingleFlight()
+    outcome = _run_coalesced(flight, lambda: {'clauses': ['pets']})
+
+    result, shared = outcome['leader']
+    result['clauses'].append('parking')
+    assert shared is True
+    assert outcome['result'] == ({'clauses': ['pets']}, True)
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_base_exception_reaches_waiters():
+    flight = SingleFlight()
+
+    def fail():
+        raise Cancelled()
+
+    outcome = _run_coalesced(flight, fail)
+    assert isinstance(outcome['leader_error'], Cancelled)
+    assert isinstance(outcome['error'], Cancelled)
+    assert flight.stats()['errors'] == 1
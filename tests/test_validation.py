@@ -0,0 +1,26 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.validation import CompiledValidator, FieldRule
+
+
+def test_text_field_with_date_bound_skips_rule(capsys):
+    structure = {'sections': [{'fields': [
+        {'name': 'landlord_name', 'type': 'text', 'validation': {'min': '2023-01-01', 'max': 5}}
+    ]}]}
+    validator = CompiledValidator.from_structure(structure)
+
+    assert 'Invalid min bound for text field landlord_name' in capsys.readouterr().out
+    # 不兼容的 min 被跳过，max 仍然生效
+    assert validator.validate({'landlord_name': 'Ann'}) == []
+    assert [e.code for e in validator.validate({'landlord_name': 'Annabelle'})] == ['max']
+
+
+def test_date_field_with_numeric_bound_skips_rule(capsys):
+    validator = CompiledValidator([
+        FieldRule('start_date', type='date', min=0, max='2030-12-31')
+    ])
+
+    assert 'Invalid min bound for date field start_date' in capsys.readouterr().out
+    assert validator.validate({'start_date': '1990-01-01'}) == []
+    assert [e.code for e in validator.validate({'start_date': '2031-01-01'})] == ['max']
@@ -0,0 +1,35 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+
+from core.catalog_snapshot import DEFAULT_SNAPSHOT_PATH, SnapshotFile, write_snapshot
+from database.orm import get_db_session
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从数据库构建目录快照文件，供 worker 启动时 mmap 加载')
+    parser.add_argument('--output', default=DEFAULT_SNAPSHOT_PATH, help='快照文件路径')
+    parser.add_argument('--languages', nargs='*', help='包含的翻译语言（默认全部）')
+    parser.add_argument('--verify', action='store_true', help='只检查已有快照是否与数据库一致')
+    args = parser.parse_args()
+
+    if args.verify:
+        snapshot = SnapshotFile(args.output)
+        try:
+            valid = snapshot.verify()
+        finally:
+            snapshot.close()
+        print("快照与数据库一致" if valid else "快照已过期，请重新构建")
+        sys.exit(0 if valid else 1)
+
+    session, _ = get_db_session()
+    try:
+        meta = write_snapshot(args.output, session, args.languages)
+    finally:
+        session.close()
+    counts = ", ".join(f"{name} {count}" for name, count in meta['counts'].items())
+    print(f"已写入 {args.output} ({meta['bytes']} 字节): {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import glob
+import json
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pdf_processor.cache import ParseCache, hash_file, write_json_atomic
+from pdf_processor.extractor import iter_pages
+from pdf_processor.parser import TEMPLATE_IMPORT_OPTIONS, ContractParser
+
+# 文件名前缀 -> 省份代码
+PROVINCE_PREFIXES = {
+    'ontario': 'ON',
+    'on': 'ON',
+    'bc': 'BC',
+    'british_columbia': 'BC',
+    'alberta': 'AB',
+    'ab': 'AB',
+    'quebec': 'QC',
+    'qc': 'QC',
+}
+
+MANIFEST_NAME = '.import_manifest.json'
+
+
+def detect_province(pdf_path: str) -> Optional[str]:
+    """根据文件名推断省份，例如 Ontario_Residential_Tenancy_Agreement.pdf -> ON"""
+    name = os.path.splitext(os.path.basename(pdf_path))[0].lower()
+    for prefix in sorted(PROVINCE_PREFIXES, key=len, reverse=True):
+        if name == prefix or name.startswith(prefix + '_'):
+            return PROVINCE_PREFIXES[prefix]
+    return None
+
+
+def extract_pages(pdf_path: str) -> List[str]:
+    """在子进程中提取每页文本"""
+    return [page.text for page in iter_pages(pdf_path)]
+
+
+class ImportManifest:
+    """记录每个文件导入状态的清单文件，用于进度展示和断点续传"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+
+    def is_done(self, name: str, content_hash: str) -> bool:
+        entry = self.files.get(name)
+        return bool(entry and entry.get('status') == 'imported' and entry.get('sha256') == content_hash)
+
+    def update(self, name: str, **fields) -> None:
+        with self._lock:
+            entry = self.files.setdefault(name, {})
+            entry.update(fields)
+            entry['updated_at'] = datetime.now().isoformat()
+            write_json_atomic(self.path, {'files': self.files})
+
+
+class BatchTemplateImporter:
+    """批量导入目录中的合同模板 PDF
+
+    文本提取在进程池中执行，LLM 结构分析在受并发上限约束的异步任务中执行，
+    数据库写入每 batch_size 个模板提交一次事务。
+    """
+
+    def __init__(self, directory: str, api_config: Dict, province: Optional[str] = None,
+                 workers: Optional[int] = None, concurrency: int = 4, batch_size: int = 10,
+                 manifest_path: Optional[str] = None, cache_dir: Optional[str] = None):
+        self.directory = directory
+        self.api_config = api_config
+        self.province = province
+        self.workers = workers
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.manifest = ImportManifest(manifest_path or os.path.join(directory, MANIFEST_NAME))
+        self.cache = ParseCache(cache_dir)
+        self.stats = {'total': 0, 'skipped': 0, 'imported': 0, 'failed': 0, 'cache_hits': 0}
+        self._done = 0
+
+    def _new_parser(self) -> ContractParser:
+        return ContractParser(
+            self.api_config['api_key'],
+            self.api_config['base_url'],
+            self.api_config['model'],
+            cache=self.cache,
+            # 按章节分块分析，之后导入修订版时未改动的章节直接从缓存复用；
+            # 并发上限由 semaphore 按文件控制，单个文件内的章节依次分析
+            max_concurrency=1,
+            **TEMPLATE_IMPORT_OPTIONS
+        )
+
+    def _progress(self, name: str, status: str) -> None:
+        print(f"[{self._done}/{self.stats['total']}] {name}: {status}")
+
+    def run(self) -> Dict:
+        """执行导入并返回统计信息"""
+        started = time.perf_counter()
+        asyncio.run(self._run())
+        self.stats['seconds'] = round(time.perf_counter() - started, 2)
+        print(f"\n导入完成: {self.stats}")
+        return self.stats
+
+    async def _run(self) -> None:
+        pdf_paths = sorted(glob.glob(os.path.join(self.directory, '*.pdf')))
+        self.stats['total'] = len(pdf_paths)
+
+        pending = []
+        for pdf_path in pdf_paths:
+            name = os.path.basename(pdf_path)
+            content_hash = hash_file(pdf_path)
+            if self.manifest.is_done(name, content_hash):
+                self.stats['skipped'] += 1
+                self._done += 1
+                self._progress(name, 'already imported, skipped')
+                continue
+            province = self.province or detect_province(pdf_path)
+            if not province:
+                self.stats['failed'] += 1
+                self._done += 1
+                self.manifest.update(name, sha256=content_hash, status='failed',
+                                     error='Cannot determine province from file name')
+                self._progress(name, 'failed (unknown province)')
+                continue
+            self.manifest.update(name, sha256=content_hash, status='pending', province=province, error=None)
+            pending.append((pdf_path, name, content_hash, province))
+
+        if not pending:
+            return
+
+        from database.orm import get_db_session
+        session, _ = get_db_session()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        batch = []
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                tasks = [
+                    asyncio.ensure_future(self._process(pool, loop, semaphore, *item))
+                    for item in pending
+                ]
+                for task in asyncio.as_completed(tasks):
+                    result = await task
+                    if result is None:
+                        continue
+                    batch.append(result)
+                    if len(batch) >= self.batch_size:
+                        await asyncio.to_thread(self._flush, session, batch)
+                        batch = []
+                if batch:
+                    await asyncio.to_thread(self._flush, session, batch)
+        finally:
+            session.close()
+
+    async def _process(self, pool, loop, semaphore, pdf_path: str, name: str,
+                       content_hash: str, province: str) -> Optional[tuple]:
+        """提取并分析单个文件，返回 (name, template_data)"""
+        parser = self._new_parser()
+        try:
+            template_data = parser.load_cached(content_hash)
+            if template_data is not None:
+                self.stats['cache_hits'] += 1
+            else:
+                pages = await loop.run_in_executor(pool, extract_pages, pdf_path)
+                self.manifest.update(name, status='extracted', pages=len(pages))
+                async with semaphore:
+                    template_data = await asyncio.to_thread(parser.parse_extracted, pages, content_hash)
+            template_data['province'] = province
+            template_data['content_hash'] = content_hash
+            self.manifest.update(name, status='analyzed')
+            return name, template_data
+        except Exception as e:
+            self.stats['failed'] += 1
+            self._done += 1
+            self.manifest.update(name, status='failed', error=str(e))
+            self._progress(name, f'failed ({e})')
+            return None
+
+    def _flush(self, session, batch: List[tuple]) -> None:
+        """在一个事务中写入一批模板，已导入过的文件只更新原有记录"""
+        from database.repository import TemplateRepository
+        try:
+            template_ids = TemplateRepository(session).upsert_many([data for _, data in batch])
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            for name, _ in batch:
+                self.stats['failed'] += 1
+                self._done += 1
+                self.manifest.update(name, status='failed', error=f'Database error: {e}')
+                self._progress(name, 'failed (database)')
+            return
+
+        for (name, _), template_id in zip(batch, template_ids):
+            self.stats['imported'] += 1
+            self._done += 1
+            self.manifest.update(name, status='imported', template_id=template_id, error=None)
+            self._progress(name, f'imported (template id {template_id})')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量导入合同模板 PDF')
+    parser.add_argument('directory', nargs='?', default='data/templates', help='PDF 所在目录')
+    parser.add_argument('--province', help='所有文件使用的省份代码（默认根据文件名推断）')
+    parser.add_argument('--workers', type=int, default=None, help='文本提取进程数')
+    parser.add_argument('--concurrency', type=int, default=4, help='LLM 并发请求上限')
+    parser.add_argument('--batch-size', type=int, default=10, help='每个事务写入的模板数')
+    parser.add_argument('--manifest', help='状态清单路径（默认 <directory>/.import_manifest.json）')
+    parser.add_argument('--cache-dir', help='解析缓存目录')
+    args = parser.parse_args()
+
+    from config import DEEPSEEK_CONFIG
+    BatchTemplateImporter(
+        args.directory,
+        DEEPSEEK_CONFIG,
+        province=args.province,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        manifest_path=args.manifest,
+        cache_dir=args.cache_dir
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import signal
+import subprocess
+import time
+
+from core.shared_catalog import SharedCatalog, build_catalog_sections
+from database.orm import get_db_session
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_workers(count: int, base_port: int) -> None:
+    """构建一次共享目录，然后启动 count 个 app.py worker，分别监听 base_port 起的端口"""
+    session, _ = get_db_session()
+    try:
+        sections = build_catalog_sections(session)
+    finally:
+        session.close()
+
+    shared = SharedCatalog.create(sections, meta={'built_at': time.time()})
+    print(f"共享目录 {shared.name}: {shared.shm.size} 字节, "
+          + ", ".join(f"{name} {len(entries)} 条" for name, entries in sections.items()))
+    del sections
+
+    workers = []
+    try:
+        for index in range(count):
+            env = dict(os.environ,
+                       LEXCRAFT_SHARED_CATALOG=shared.name,
+                       GRADIO_SERVER_PORT=str(base_port + index))
+            workers.append(subprocess.Popen([sys.executable, os.path.join(ROOT, 'app.py')], env=env))
+            print(f"worker {index + 1} 已启动，端口 {base_port + index}")
+        for worker in workers:
+            worker.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            if worker.poll() is None:
+                worker.send_signal(signal.SIGTERM)
+        for worker in workers:
+            worker.wait()
+        shared.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='以共享只读目录启动多个 app.py worker')
+    parser.add_argument('--workers', type=int, default=2, help='worker 进程数')
+    parser.add_argument('--base-port', type=int, default=7860, help='第一个 worker 的端口')
+    args = parser.parse_args()
+    run_workers(args.workers, args.base_port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import re
+import subprocess
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动路径上需要关注的模块
+DEFAULT_MODULES = (
+    'main',
+    'core',
+    'core.assistance',
+    'core.ContractGenerator',
+    'core.exporter',
+    'pdf_processor.parser',
+)
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+_baseline: Optional[set] = None
+
+
+def _run_importtime(code: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    return subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+
+
+def _parse_importtime(stderr: str) -> Dict[str, int]:
+    """解析 -X importtime 输出，按根包汇总自身导入耗时（微秒）"""
+    packages: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            package = match.group(4).split('.')[0]
+            packages[package] = packages.get(package, 0) + int(match.group(1))
+    return packages
+
+
+def _baseline_packages() -> set:
+    """解释器启动本身导入的包，不计入模块的导入耗时"""
+    global _baseline
+    if _baseline is None:
+        _baseline = set(_parse_importtime(_run_importtime('pass').stderr))
+    return _baseline
+
+
+def profile_import(module: str) -> Dict:
+    """在新的解释器中以 -X importtime 导入 module，返回耗时汇总
+
+    Returns:
+        {'module', 'ok', 'error', 'total_ms', 'top': [(根包名, 自身导入毫秒), ...]}
+    """
+    result = _run_importtime(f'import {module}')
+    baseline = _baseline_packages()
+    packages = {
+        name: us for name, us in _parse_importtime(result.stderr).items()
+        if name not in baseline
+    }
+    total_us = sum(packages.values())
+
+    error = None
+    if result.returncode != 0:
+        lines = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        error = lines[-1] if lines else f'exit code {result.returncode}'
+    top = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {
+        'module': module,
+        'ok': result.returncode == 0,
+        'error': error,
+        'total_ms': total_us / 1000,
+        'top': [(name, us / 1000) for name, us in top],
+    }
+
+
+def import_time_report(modules: Optional[List[str]] = None, top: int = 8,
+                       budget_ms: Optional[float] = None) -> bool:
+    """打印各模块的导入耗时报告；指定 budget_ms 时返回是否全部在预算内"""
+    within_budget = True
+    for module in modules or DEFAULT_MODULES:
+        profile = profile_import(module)
+        status = 'ok' if profile['ok'] else f"failed: {profile['error']}"
+        over = budget_ms is not None and profile['total_ms'] > budget_ms
+        within_budget = within_budget and not over
+        print(f"\n{module}: {profile['total_ms']:.1f} ms ({status})" + ('  <-- over budget' if over else ''))
+        for name, ms in profile['top'][:top]:
+            print(f"    {name:<32} {ms:8.1f} ms")
+    return within_budget
+
+
+if __name__ == "__main__":
+    sys.exit(0 if import_time_report(sys.argv[1:] or None) else 1)